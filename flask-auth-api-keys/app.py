@@ -1,14 +1,17 @@
 import secrets
 from flask import Flask, request, jsonify
 from flask_sqlalchemy import SQLAlchemy
+from db_config import engine_options, register_pool_metrics
 
 app = Flask(__name__)
 
 # Config
 app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///apikey.db"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
 
 db = SQLAlchemy(app)
+register_pool_metrics(app, db)
 
 # ------------------- MODELS -------------------
 class User(db.Model):
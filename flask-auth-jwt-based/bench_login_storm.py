@@ -0,0 +1,140 @@
+"""Measure CRUD latency while a storm of logins runs against the same app.
+
+Usage: python bench_login_storm.py --url http://localhost:5000 [--url http://localhost:5001]
+                                   [--readers 4] [--storm 32] [--seconds 10]
+
+Start the app twice with the same server settings, once hashing inline and once
+with the worker pool, for example:
+    PASSWORD_WORKERS=0 flask run -p 5000 --with-threads
+    PASSWORD_WORKERS=2 flask run -p 5001 --with-threads
+For each app the benchmark signs up a user, logs in, creates an item, then reads
+it with --readers threads for --seconds, first alone and then while --storm
+threads log in back to back. With inline hashing the read latency climbs with
+the storm; with the pool it stays close to the quiet numbers and the surplus
+logins get 429. Works with the JWT and the session app.
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+USERNAME = "bench-user"
+PASSWORD = "bench-password"
+
+
+class Client:
+    """One keep-alive connection that carries the login cookie or JWT."""
+
+    def __init__(self, url):
+        parsed = urlparse(url)
+        self.conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=60)
+        self.headers = {}
+
+    def request(self, method, path, payload=None):
+        headers = dict(self.headers)
+        body = None
+        if payload is not None:
+            body = json.dumps(payload)
+            headers["Content-Type"] = "application/json"
+        try:
+            self.conn.request(method, path, body, headers)
+            response = self.conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            # The server closed the connection, retry once on a new one
+            self.conn.close()
+            self.conn.request(method, path, body, headers)
+            response = self.conn.getresponse()
+        data = response.read()
+        if response.getheader("Connection", "").lower() == "close":
+            self.conn.close()
+        return response, data
+
+    def login(self):
+        response, data = self.request("POST", "/login", {"username": USERNAME, "password": PASSWORD})
+        if response.status == 200:
+            token = json.loads(data).get("access_token")
+            if token:
+                self.headers["Authorization"] = f"Bearer {token}"
+            cookie = response.getheader("Set-Cookie")
+            if cookie:
+                self.headers["Cookie"] = cookie.split(";", 1)[0]
+        return response.status
+
+
+def setup(url):
+    client = Client(url)
+    client.request("POST", "/signup", {"username": USERNAME, "password": PASSWORD})
+    status = client.login()
+    if status != 200:
+        raise SystemExit(f"{url}: login failed with {status}")
+    response, data = client.request("POST", "/items", {"name": "bench", "value": "1"})
+    return client.headers, json.loads(data)["id"]
+
+
+def reader(url, headers, item_id, deadline, latencies):
+    client = Client(url)
+    client.headers = headers
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response, _ = client.request("GET", f"/items/{item_id}")
+        if response.status == 200:
+            latencies.append(time.perf_counter() - started)
+
+
+def stormer(url, stop, statuses, lock):
+    client = Client(url)
+    while not stop.is_set():
+        status = client.login()
+        with lock:
+            statuses[status] += 1
+
+
+def percentile(latencies, p):
+    latencies = sorted(latencies)
+    return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000 if latencies else 0.0
+
+
+def measure(url, headers, item_id, readers, seconds):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=reader, args=(url, headers, item_id, deadline, latencies))
+               for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies) / seconds, percentile(latencies, 0.5), percentile(latencies, 0.99)
+
+
+def run(url, readers, storm, seconds):
+    headers, item_id = setup(url)
+    quiet = measure(url, headers, item_id, readers, seconds)
+
+    stop, lock, statuses = threading.Event(), threading.Lock(), Counter()
+    stormers = [threading.Thread(target=stormer, args=(url, stop, statuses, lock)) for _ in range(storm)]
+    for thread in stormers:
+        thread.start()
+    busy = measure(url, headers, item_id, readers, seconds)
+    stop.set()
+    for thread in stormers:
+        thread.join()
+
+    for label, (rps, p50, p99) in (("quiet", quiet), (f"{storm} logins", busy)):
+        print(f"{url} {label:>10}: GET /items/<id> {rps:7,.0f} req/s, p50 {p50:7.1f} ms, p99 {p99:7.1f} ms")
+    logins = ", ".join(f"{count} x {status}" for status, count in sorted(statuses.items()))
+    print(f"{url} {'':>10}  logins during the storm: {logins}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", action="append", required=True, help="app to test, can be repeated")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--storm", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    for url in args.url:
+        run(url, args.readers, args.storm, args.seconds)
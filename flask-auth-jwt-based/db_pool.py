@@ -0,0 +1,132 @@
+"""MySQL connection pool for the JWT app, read from environment variables.
+
+DB_POOL_SIZE            connections opened at startup and reused by every request
+                        (default 5, at most 32)
+DB_POOL_TIMEOUT         seconds a request waits for a free connection before it
+                        gets a 503 (default 2)
+DB_CONNECT_TIMEOUT      seconds allowed to open or reopen a connection (default 5)
+DB_CONNECT_RETRIES      attempts to create the pool at startup while MySQL comes up (default 10)
+DB_CONNECT_RETRY_DELAY  seconds between those attempts (default 5)
+
+Every checkout pings the connection and reconnects it if the server dropped it,
+and every checkin resets the session, which also rolls back an unfinished transaction.
+"""
+from contextlib import contextmanager
+import os
+import threading
+import time
+
+from flask import jsonify
+from mysql.connector import Error
+from mysql.connector.pooling import MySQLConnectionPool
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 2))
+CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", 5))
+CONNECT_RETRIES = int(os.getenv("DB_CONNECT_RETRIES", 10))
+CONNECT_RETRY_DELAY = float(os.getenv("DB_CONNECT_RETRY_DELAY", 5))
+
+
+class PoolTimeout(Exception):
+    """No connection became free within DB_POOL_TIMEOUT."""
+
+
+class ConnectionPool:
+    """MySQLConnectionPool that waits a bounded time for a free connection and counts checkouts.
+
+    MySQLConnectionPool itself raises as soon as every connection is in use, so a
+    semaphore with one slot per connection lets requests queue for up to `timeout`.
+    """
+
+    def __init__(self, size, timeout, **config):
+        self.size = size
+        self.timeout = timeout
+        self.pool = MySQLConnectionPool(pool_name="flask_jwt", pool_size=size, **config)
+        self.slots = threading.BoundedSemaphore(size)
+        self.stats_lock = threading.Lock()
+        self.checked_out = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    @contextmanager
+    def connection(self):
+        """Check out a live connection and return it to the pool afterwards."""
+        started = time.perf_counter()
+        acquired = self.slots.acquire(timeout=self.timeout)
+        waited = time.perf_counter() - started
+        with self.stats_lock:
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            if not acquired:
+                self.timeouts += 1
+        if not acquired:
+            raise PoolTimeout(f"no free database connection after {self.timeout}s")
+
+        try:
+            conn = self.pool.get_connection()
+        except Error:
+            self.slots.release()
+            with self.stats_lock:
+                self.errors += 1
+            raise
+
+        with self.stats_lock:
+            self.checkouts += 1
+            self.checked_out += 1
+        try:
+            yield conn
+        finally:
+            try:
+                conn.close()
+            except Error:
+                # The connection still went back to the pool; the next checkout reconnects it
+                with self.stats_lock:
+                    self.errors += 1
+            with self.stats_lock:
+                self.checked_out -= 1
+            self.slots.release()
+
+    def stats(self):
+        with self.stats_lock:
+            return {
+                "size": self.size,
+                "checked_out": self.checked_out,
+                "checked_in": self.size - self.checked_out,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+                "wait_avg_ms": self.wait_total / (self.checkouts + self.timeouts) * 1000
+                if self.checkouts + self.timeouts else 0.0,
+                "wait_max_ms": self.wait_max * 1000,
+            }
+
+
+def create_pool(**config):
+    """Open the pool, retrying while MySQL is still starting."""
+    for i in range(CONNECT_RETRIES):
+        try:
+            pool = ConnectionPool(POOL_SIZE, POOL_TIMEOUT, connection_timeout=CONNECT_TIMEOUT, **config)
+            print(f"Connected to MySQL with a pool of {POOL_SIZE} connections")
+            return pool
+        except Error as e:
+            print(f"MySQL connection failed ({i+1}/{CONNECT_RETRIES}): {e}")
+            time.sleep(CONNECT_RETRY_DELAY)
+    raise Exception("Could not connect to MySQL after several retries")
+
+
+def init_db_pool(app, **config):
+    """Create the pool, answer 503 when it stays exhausted and expose its statistics at GET /metrics/pool."""
+    pool = create_pool(**config)
+
+    @app.errorhandler(PoolTimeout)
+    def pool_timeout(e):
+        return jsonify({"error": "Database busy, try again"}), 503
+
+    @app.route("/metrics/pool", methods=["GET"])
+    def pool_metrics():
+        return jsonify(pool.stats())
+
+    return pool
@@ -0,0 +1,139 @@
+"""Password hashing outside the request threads, in a bounded pool of worker processes.
+
+BCRYPT_ROUNDS           bcrypt work factor for new hashes; a hash made with another
+                        factor is replaced at the user's next login (default 12)
+PASSWORD_WORKERS        processes hashing passwords, 0 hashes inline in the request
+                        thread without a queue limit (default one less than the CPU count)
+PASSWORD_QUEUE_DEPTH    hashes running or waiting in this app process before signup and
+                        login answer 429 (default 4 per worker)
+
+Each bcrypt hash keeps a core busy for 100+ ms. Limiting them to PASSWORD_WORKERS
+processes leaves the remaining CPU to the other routes during a burst of logins, and
+the queue limit turns an overload into immediate 429s instead of ever slower logins.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+import threading
+import time
+
+import bcrypt
+from flask import jsonify
+
+ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+WORKERS = int(os.getenv("PASSWORD_WORKERS", max((os.cpu_count() or 2) - 1, 1)))
+QUEUE_DEPTH = int(os.getenv("PASSWORD_QUEUE_DEPTH", max(WORKERS, 1) * 4))
+
+
+class PasswordPoolBusy(Exception):
+    """PASSWORD_QUEUE_DEPTH hashes are already running or waiting."""
+
+
+def rounds_of(hashed):
+    # "$2b$12$<salt><hash>"
+    return int(hashed.split("$")[2])
+
+
+def hash_password(password, rounds):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def check_password(password, hashed, rounds):
+    """Return whether the password matches, and a new hash if the stored one uses another work factor."""
+    if not bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8")):
+        return False, None
+    if rounds_of(hashed) == rounds:
+        return True, None
+    return True, hash_password(password, rounds)
+
+
+def exit_with_parent(parent_pid):
+    """Worker initializer: exit once the app process is gone, since a SIGTERM skips the executor shutdown."""
+
+    def watch():
+        while os.getppid() == parent_pid:
+            time.sleep(1)
+        os._exit(0)
+
+    threading.Thread(target=watch, daemon=True).start()
+
+
+class PasswordPool:
+    """Runs hash_password and check_password in worker processes, at most queue_depth at a time."""
+
+    def __init__(self, workers, queue_depth, rounds):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.rounds = rounds
+        self.slots = threading.BoundedSemaphore(queue_depth)
+        self.stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.executor = None
+        if workers > 0:
+            # Fork so the workers start from the imported app instead of importing it again,
+            # and start them now, before the server runs any request threads
+            self.executor = ProcessPoolExecutor(
+                workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=exit_with_parent,
+                initargs=(os.getpid(),),
+            )
+            self.executor.submit(int).result()
+
+    def hash(self, password):
+        return self._run(hash_password, password, self.rounds)
+
+    def check(self, password, hashed):
+        """Return (matches, new hash or None); store the new hash to finish a work factor change."""
+        matches, new_hash = self._run(check_password, password, hashed, self.rounds)
+        if new_hash is not None:
+            with self.stats_lock:
+                self.rehashed += 1
+        return matches, new_hash
+
+    def _run(self, fn, *args):
+        if self.executor is None:
+            return fn(*args)
+        if not self.slots.acquire(blocking=False):
+            with self.stats_lock:
+                self.rejected += 1
+            raise PasswordPoolBusy()
+        with self.stats_lock:
+            self.in_flight += 1
+        try:
+            return self.executor.submit(fn, *args).result()
+        finally:
+            with self.stats_lock:
+                self.in_flight -= 1
+                self.completed += 1
+            self.slots.release()
+
+    def stats(self):
+        with self.stats_lock:
+            return {
+                "workers": self.workers,
+                "rounds": self.rounds,
+                "queue_depth": self.queue_depth,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+            }
+
+
+def init_password_pool(app):
+    """Start the workers, answer 429 when the queue is full and expose counters at GET /metrics/passwords."""
+    passwords = PasswordPool(WORKERS, QUEUE_DEPTH, ROUNDS)
+
+    @app.errorhandler(PasswordPoolBusy)
+    def password_pool_busy(e):
+        return jsonify({"error": "Too many logins in progress, try again"}), 429, {"Retry-After": "1"}
+
+    @app.route("/metrics/passwords", methods=["GET"])
+    def password_metrics():
+        return jsonify(passwords.stats())
+
+    return passwords
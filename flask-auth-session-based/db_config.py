@@ -0,0 +1,105 @@
+"""Engine and connection-pool settings for the SQLAlchemy apps, read from environment variables.
+
+DB_POOL_SIZE            connections kept open in the pool (default 5)
+DB_MAX_OVERFLOW         extra connections allowed during bursts (default 10)
+DB_POOL_TIMEOUT         seconds to wait for a free connection before failing (default 30)
+DB_POOL_RECYCLE         seconds before a connection is replaced, keep it below
+                        MySQL's wait_timeout (default 1800)
+DB_POOL_PRE_PING        test connections on checkout and reconnect if stale (default true)
+DB_STATEMENT_TIMEOUT_MS abort statements running longer than this, 0 disables (default 0)
+"""
+import os
+import threading
+import time
+
+from flask import jsonify
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+def env_flag(name, default):
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that records how long callers wait to check out a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            with self.stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self.stats_lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+    def recreate(self):
+        pool = super().recreate()
+        # Keep counting across dispose() so the metrics cover the process lifetime
+        pool.checkouts, pool.timeouts = self.checkouts, self.timeouts
+        pool.wait_total, pool.wait_max = self.wait_total, self.wait_max
+        return pool
+
+
+def engine_options(uri):
+    """Return SQLALCHEMY_ENGINE_OPTIONS for the given database URI."""
+    backend = make_url(uri).get_backend_name()
+    options = {
+        "poolclass": MeteredQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": env_flag("DB_POOL_PRE_PING", True),
+    }
+
+    timeout_ms = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+    if timeout_ms > 0:
+        if backend == "postgresql":
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout_ms}"}
+        elif backend == "mysql":
+            # max_execution_time applies to SELECT statements (MySQL 5.7.8+)
+            options["connect_args"] = {"init_command": f"SET SESSION max_execution_time={timeout_ms}"}
+    return options
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    stats = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
+    if isinstance(pool, MeteredQueuePool):
+        with pool.stats_lock:
+            stats.update({
+                "checkouts": pool.checkouts,
+                "timeouts": pool.timeouts,
+                "wait_avg_ms": pool.wait_total / pool.checkouts * 1000 if pool.checkouts else 0.0,
+                "wait_max_ms": pool.wait_max * 1000,
+            })
+    return stats
+
+
+def register_pool_metrics(app, db):
+    """Expose the pool statistics at GET /metrics/pool."""
+
+    @app.route("/metrics/pool", methods=["GET"])
+    def pool_metrics():
+        return jsonify(pool_stats(db.engine))
@@ -2,6 +2,7 @@ import os
 import time
 import requests
 from flask_sqlalchemy import SQLAlchemy
+from db_config import engine_options, register_pool_metrics
 from flask import Flask, request, jsonify
 from sqlalchemy.exc import OperationalError
 
@@ -15,8 +16,10 @@ DB_NAME = os.getenv("DB_NAME", "item_service")
 
 app.config["SQLALCHEMY_DATABASE_URI"] = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:3306/{DB_NAME}"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
 
 db = SQLAlchemy(app)
+register_pool_metrics(app, db)
 
 USER_SERVICE_URL = os.getenv("USER_SERVICE_URL", "http://localhost:5000")  # User service must be running
 
@@ -0,0 +1,156 @@
+from quart import Quart, request, jsonify, Response
+from pymongo import AsyncMongoClient, ReturnDocument
+from bson import ObjectId
+import json
+import os
+
+app = Quart(__name__)
+
+# Load environment variables
+DB_USER = os.getenv("DB_USER", "root")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "password")
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_NAME = os.getenv("DB_NAME", "flask_crud")
+
+# MongoDB configuration
+MONGO_URI = f"mongodb://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:27017/{DB_NAME}?authSource=admin"
+# Connections per worker; requests beyond this wait for a free connection without holding a thread
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+
+MAX_PAGE_SIZE = 1000
+# Documents fetched per round-trip from the server cursor
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", 1000))
+# Only the fields item_to_dict needs (_id is always returned)
+ITEM_PROJECTION = {"name": 1, "value": 1}
+
+client = None
+
+# The client belongs to the event loop that serves the requests, so open it there
+@app.before_serving
+async def open_client():
+    global client
+    client = AsyncMongoClient(MONGO_URI, maxPoolSize=MONGO_MAX_POOL_SIZE)
+
+@app.after_serving
+async def close_client():
+    await client.close()
+
+def items_collection():
+    return client[DB_NAME].items
+
+# Helper: convert MongoDB document to dict with string id
+def item_to_dict(item):
+    return {
+        "id": str(item["_id"]),
+        "name": item.get("name", ""),
+        "value": item.get("value", "")
+    }
+
+# ------------------- LISTING HELPERS -------------------
+
+# Walk the collection in _id order, BATCH_SIZE documents per round-trip
+def find_items(after_id=None, limit=0):
+    query = {"_id": {"$gt": after_id}} if after_id is not None else {}
+    cursor = items_collection().find(query, ITEM_PROJECTION, batch_size=BATCH_SIZE)
+    return cursor.sort("_id", 1).limit(limit)
+
+# Encode documents as they arrive from the cursor, as a chunked JSON array or NDJSON
+def stream_items(after_id, limit, fmt):
+    if fmt == "ndjson":
+        async def generate():
+            async for item in find_items(after_id, limit or 0):
+                yield json.dumps(item_to_dict(item)) + "\n"
+        return Response(generate(), mimetype="application/x-ndjson")
+
+    async def generate():
+        yield "["
+        first = True
+        async for item in find_items(after_id, limit or 0):
+            yield ("" if first else ",") + json.dumps(item_to_dict(item))
+            first = False
+        yield "]"
+    return Response(generate(), mimetype="application/json")
+
+# ------------------- CRUD ROUTES -------------------
+
+# Create
+@app.route('/items', methods=['POST'])
+async def create_item():
+    data = await request.get_json()
+    new_item = {
+        "name": data.get("name", ""),
+        "value": data.get("value", "")
+    }
+    result = await items_collection().insert_one(new_item)
+    new_item["_id"] = result.inserted_id
+    return jsonify(item_to_dict(new_item)), 201
+
+# Read all
+@app.route('/items', methods=['GET'])
+async def get_items():
+    after_id = request.args.get("after_id")
+    limit = request.args.get("limit", type=int)
+    stream = request.args.get("stream")
+
+    if limit is not None and limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    if after_id is not None:
+        if not ObjectId.is_valid(after_id):
+            return jsonify({"error": "Invalid ObjectId"}), 400
+        after_id = ObjectId(after_id)
+
+    if stream:
+        if stream not in ("json", "ndjson"):
+            return jsonify({"error": "stream must be 'json' or 'ndjson'"}), 400
+        return stream_items(after_id, limit, stream)
+
+    if limit is None and after_id is None:
+        items = items_collection().find({}, ITEM_PROJECTION, batch_size=BATCH_SIZE)
+        return jsonify([item_to_dict(item) async for item in items])
+
+    # Keyset pagination: seek past the last _id seen instead of skipping documents
+    limit = min(limit or MAX_PAGE_SIZE, MAX_PAGE_SIZE)
+    items = [item_to_dict(item) async for item in find_items(after_id, limit)]
+    response = jsonify(items)
+    if len(items) == limit:
+        response.headers["X-Next-Cursor"] = items[-1]["id"]
+    return response
+
+# Read one
+@app.route('/items/<string:item_id>', methods=['GET'])
+async def get_item(item_id):
+    if not ObjectId.is_valid(item_id):
+        return jsonify({"error": "Invalid ObjectId"}), 400
+    item = await items_collection().find_one({"_id": ObjectId(item_id)})
+    if not item:
+        return jsonify({"error": "Item not found"}), 404
+    return jsonify(item_to_dict(item))
+
+# Update
+@app.route('/items/<string:item_id>', methods=['PUT'])
+async def update_item(item_id):
+    data = await request.get_json()
+    if not ObjectId.is_valid(item_id):
+        return jsonify({"error": "Invalid ObjectId"}), 400
+    updated = await items_collection().find_one_and_update(
+        {"_id": ObjectId(item_id)},
+        {"$set": {"name": data.get("name"), "value": data.get("value")}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated:
+        return jsonify({"error": "Item not found"}), 404
+    return jsonify(item_to_dict(updated))
+
+# Delete
+@app.route('/items/<string:item_id>', methods=['DELETE'])
+async def delete_item(item_id):
+    if not ObjectId.is_valid(item_id):
+        return jsonify({"error": "Invalid ObjectId"}), 400
+    deleted = await items_collection().find_one_and_delete({"_id": ObjectId(item_id)})
+    if not deleted:
+        return jsonify({"error": "Item not found"}), 404
+    return jsonify(item_to_dict(deleted))
+
+# ------------------- RUN APP -------------------
+if __name__ == '__main__':
+    app.run(debug=True, host="0.0.0.0", port=5000)
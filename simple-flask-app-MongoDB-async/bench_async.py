@@ -0,0 +1,128 @@
+"""Load-test the threaded and the async MongoDB app with thousands of concurrent requests.
+
+Usage: python bench_async.py --url http://localhost:5000 [--url http://localhost:5001]
+                             [--concurrency 100,1000,3000] [--seconds 10] [--path "/items?limit=100"]
+
+Give both apps the same small, fixed thread budget, for example:
+    gunicorn -w 1 --threads 8 -b :5000 app:app    (in simple-flask-app-MongoDB)
+    hypercorn -w 1 -b :5001 app:app               (in this directory, one event loop thread)
+Every simulated client keeps one connection open and sends requests back to back,
+so the threaded app queues every client beyond its thread count while the async
+app keeps them all in flight. Requests are slow-ish because each one waits on
+MongoDB; add latency to that link (for example `tc qdisc add dev eth0 root netem
+delay 20ms` in the MongoDB container) to see the difference grow.
+Raise the open file limit (`ulimit -n 10000`) before using thousands of clients.
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlparse
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding") == "chunked":
+        body = b""
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            chunk = await reader.readexactly(size + 2)
+            if size == 0:
+                break
+            body += chunk[:-2]
+    else:
+        body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, body, headers.get("connection", "").lower() != "close"
+
+
+async def request(reader, writer, host, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    head = f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n"
+    if payload is not None:
+        head += "Content-Type: application/json\r\n"
+    writer.write(head.encode() + b"\r\n" + body)
+    await writer.drain()
+    return await read_response(reader)
+
+
+async def client(url, path, deadline, latencies, errors):
+    parsed = urlparse(url)
+    while time.perf_counter() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection(parsed.hostname, parsed.port or 80)
+        except OSError:
+            errors[0] += 1
+            await asyncio.sleep(0.1)
+            continue
+        try:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                status, _, keep_alive = await request(reader, writer, parsed.netloc, "GET", path)
+                if status == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors[0] += 1
+                if not keep_alive:
+                    break
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+            errors[0] += 1
+        finally:
+            writer.close()
+
+
+async def seed(url, items):
+    parsed = urlparse(url)
+
+    async def send(method, path, payload=None):
+        reader, writer = await asyncio.open_connection(parsed.hostname, parsed.port or 80)
+        try:
+            return await request(reader, writer, parsed.netloc, method, path, payload)
+        finally:
+            writer.close()
+
+    status, body, _ = await send("GET", f"/items?limit={items}")
+    missing = items - len(json.loads(body)) if status == 200 else items
+    for i in range(missing):
+        await send("POST", "/items", {"name": f"bench-{i}", "value": str(i)})
+
+
+async def run(url, path, concurrency, seconds):
+    latencies, errors = [], [0]
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    await asyncio.gather(*(client(url, path, deadline, latencies, errors) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000 if latencies else 0.0
+
+    return len(latencies) / elapsed, percentile(0.5), percentile(0.99), errors[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", action="append", required=True, help="app to test, can be repeated")
+    parser.add_argument("--concurrency", default="100,1000,3000")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--path", default="/items?limit=100")
+    parser.add_argument("--seed", type=int, default=100, help="make sure this many items exist first")
+    args = parser.parse_args()
+
+    asyncio.run(seed(args.url[0], args.seed))
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        for url in args.url:
+            rps, p50, p99, errors = asyncio.run(run(url, args.path, concurrency, args.seconds))
+            print(f"{url} x{concurrency:<5}: {rps:8,.0f} req/s, p50 {p50:7.1f} ms, "
+                  f"p99 {p99:7.1f} ms, {errors} errors")
@@ -1,7 +1,12 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_pymongo import PyMongo
 from bson import ObjectId
-from pymongo import ReturnDocument
+from pymongo import ReturnDocument, InsertOne, UpdateOne, DeleteOne
+from pymongo.errors import BulkWriteError
+from pymongo.write_concern import WriteConcern
+from collections import Counter
+from itertools import islice
+import json
 import os
 
 app = Flask(__name__)
@@ -16,6 +21,21 @@ DB_NAME = os.getenv("DB_NAME", "flask_crud")
 app.config["MONGO_URI"] = f"mongodb://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:27017/{DB_NAME}?authSource=admin"
 mongo = PyMongo(app)
 
+MAX_PAGE_SIZE = 1000
+# Documents fetched per round-trip from the server cursor
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", 1000))
+# Only the fields item_to_dict needs (_id is always returned)
+ITEM_PROJECTION = {"name": 1, "value": 1}
+
+# Entries sent to MongoDB per bulk_write by the bulk route
+BULK_CHUNK = int(os.getenv("BULK_CHUNK", 1000))
+# Write concern of the bulk route: BULK_W is a number of nodes or "majority", BULK_J waits for the journal
+BULK_W = os.getenv("BULK_W", "1")
+BULK_WRITE_CONCERN = WriteConcern(
+    w=int(BULK_W) if BULK_W.isdigit() else BULK_W,
+    j=os.getenv("BULK_J", "false").lower() in ("1", "true", "yes", "on"),
+)
+
 # Helper: convert MongoDB document to dict with string id
 def item_to_dict(item):
     return {
@@ -24,6 +44,31 @@ def item_to_dict(item):
         "value": item.get("value", "")
     }
 
+# ------------------- LISTING HELPERS -------------------
+
+# Walk the collection in _id order, BATCH_SIZE documents per round-trip
+def find_items(after_id=None, limit=0):
+    query = {"_id": {"$gt": after_id}} if after_id is not None else {}
+    cursor = mongo.db.items.find(query, ITEM_PROJECTION, batch_size=BATCH_SIZE)
+    return cursor.sort("_id", 1).limit(limit)
+
+# Encode documents as they arrive from the cursor, as a chunked JSON array or NDJSON
+def stream_items(after_id, limit, fmt):
+    if fmt == "ndjson":
+        def generate():
+            for item in find_items(after_id, limit or 0):
+                yield json.dumps(item_to_dict(item)) + "\n"
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    def generate():
+        yield "["
+        first = True
+        for item in find_items(after_id, limit or 0):
+            yield ("" if first else ",") + json.dumps(item_to_dict(item))
+            first = False
+        yield "]"
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
 # ------------------- CRUD ROUTES -------------------
 
 # Create
@@ -41,8 +86,33 @@ def create_item():
 # Read all
 @app.route('/items', methods=['GET'])
 def get_items():
-    items = mongo.db.items.find()
-    return jsonify([item_to_dict(item) for item in items])
+    after_id = request.args.get("after_id")
+    limit = request.args.get("limit", type=int)
+    stream = request.args.get("stream")
+
+    if limit is not None and limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    if after_id is not None:
+        if not ObjectId.is_valid(after_id):
+            return jsonify({"error": "Invalid ObjectId"}), 400
+        after_id = ObjectId(after_id)
+
+    if stream:
+        if stream not in ("json", "ndjson"):
+            return jsonify({"error": "stream must be 'json' or 'ndjson'"}), 400
+        return stream_items(after_id, limit, stream)
+
+    if limit is None and after_id is None:
+        items = mongo.db.items.find({}, ITEM_PROJECTION, batch_size=BATCH_SIZE)
+        return jsonify([item_to_dict(item) for item in items])
+
+    # Keyset pagination: seek past the last _id seen instead of skipping documents
+    limit = min(limit or MAX_PAGE_SIZE, MAX_PAGE_SIZE)
+    items = [item_to_dict(item) for item in find_items(after_id, limit)]
+    response = jsonify(items)
+    if len(items) == limit:
+        response.headers["X-Next-Cursor"] = items[-1]["id"]
+    return response
 
 # Read one
 @app.route('/items/<string:item_id>', methods=['GET'])
@@ -84,6 +154,138 @@ def delete_item(item_id):
         return jsonify({"error": "Item not found"}), 404
     return jsonify(item_to_dict(deleted))
 
+# ------------------- BULK ROUTE -------------------
+
+INVALID_ENTRY = object()
+
+# Entries from a JSON array body, or one per line from an NDJSON body without buffering it
+def read_bulk_body():
+    if request.mimetype == "application/x-ndjson":
+        def entries():
+            for line in request.stream:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield INVALID_ENTRY
+        return entries(), True
+    data = request.get_json()
+    if not isinstance(data, list):
+        return None, False
+    return iter(data), False
+
+def chunked(entries, size):
+    while True:
+        chunk = list(islice(entries, size))
+        if not chunk:
+            return
+        yield chunk
+
+# Turn one entry into (write, target _id, result if the write succeeds), or (None, None, error result)
+def bulk_operation(entry):
+    if not isinstance(entry, dict):
+        return None, None, {"status": 400, "error": "Each entry must be a JSON object"}
+    op = entry.get("op")
+    if op == "create":
+        item = {"_id": ObjectId(), "name": entry.get("name", ""), "value": entry.get("value", "")}
+        return InsertOne(item), None, {"id": str(item["_id"]), "status": 201, "item": item_to_dict(item)}
+    if op not in ("update", "delete"):
+        return None, None, {"status": 400, "error": "op must be 'create', 'update' or 'delete'"}
+    item_id = entry.get("id")
+    if not isinstance(item_id, str) or not ObjectId.is_valid(item_id):
+        return None, None, {"status": 400, "error": "Invalid ObjectId"}
+    target = ObjectId(item_id)
+    if op == "delete":
+        return DeleteOne({"_id": target}), target, {"id": item_id, "status": 200}
+    fields = {key: entry[key] for key in ("name", "value") if key in entry}
+    if not fields:
+        return None, None, {"id": item_id, "status": 400, "error": "update needs name or value"}
+    return UpdateOne({"_id": target}, {"$set": fields}), target, {"id": item_id, "status": 200}
+
+# Items were looked up just before the write, so a count short of the writes sent means
+# some vanished in between: all of them are 404 if none matched, and unconfirmed otherwise
+def confirm_writes(results, indexes, count, kind):
+    if count >= len(indexes):
+        return
+    for index in indexes:
+        if count == 0:
+            results[index] = {"id": results[index]["id"], "status": 404, "error": "Item not found"}
+        else:
+            results[index] = {"id": results[index]["id"], "status": 202,
+                              "error": f"Unconfirmed: {count} of {len(indexes)} {kind} in this batch found their item"}
+
+# Run one chunk and return a result per entry. Unordered writes to the same item could apply
+# in any order, so the n-th write to each item goes in round n, after the earlier ones
+def write_chunk(collection, chunk):
+    results, rounds, seen = [], [], Counter()
+    for entry in chunk:
+        write, target, result = bulk_operation(entry)
+        if write is not None:
+            n = seen[target] if target is not None else 0
+            seen[target] += 1
+            if n == len(rounds):
+                rounds.append([])
+            rounds[n].append((write, target, len(results)))
+        results.append(result)
+    for writes in rounds:
+        write_round(collection, writes, results)
+    return results
+
+# One _id lookup marks unknown items 404, then the rest go out as a single unordered bulk_write
+def write_round(collection, writes, results):
+    targets = [target for _, target, _ in writes if target is not None]
+    if targets:
+        found = {doc["_id"] for doc in collection.find({"_id": {"$in": targets}}, {"_id": 1})}
+        for _, target, index in writes:
+            if target is not None and target not in found:
+                results[index] = {"id": results[index]["id"], "status": 404, "error": "Item not found"}
+        writes = [(write, target, index) for write, target, index in writes if target is None or target in found]
+    if not writes:
+        return
+
+    try:
+        outcome = collection.bulk_write([write for write, _, _ in writes], ordered=False)
+        counts = outcome.bulk_api_result if outcome.acknowledged else None
+    except BulkWriteError as e:
+        counts = e.details
+        for error in e.details["writeErrors"]:
+            index = writes[error["index"]][2]
+            status = 409 if error["code"] == 11000 else 500
+            results[index] = {"id": results[index]["id"], "status": status, "error": error["errmsg"]}
+        for error in e.details["writeConcernErrors"]:
+            for _, _, index in writes:
+                if results[index]["status"] < 300:
+                    results[index] = {"id": results[index]["id"], "status": 500,
+                                      "error": f"Write concern error: {error['errmsg']}"}
+    if counts is None:
+        for _, _, index in writes:
+            results[index]["status"] = 202  # sent, but w=0 asks for no confirmation
+        return
+
+    def pending(kind):
+        return [index for write, _, index in writes if isinstance(write, kind) and results[index]["status"] < 300]
+
+    confirm_writes(results, pending(UpdateOne), counts["nMatched"], "updates")
+    confirm_writes(results, pending(DeleteOne), counts["nRemoved"], "deletes")
+
+# Bulk create, update and delete
+@app.route('/items/bulk', methods=['POST'])
+def bulk_write_items():
+    entries, ndjson = read_bulk_body()
+    if entries is None:
+        return jsonify({"error": "Body must be a JSON array or NDJSON"}), 400
+    collection = mongo.db.items.with_options(write_concern=BULK_WRITE_CONCERN)
+
+    def results():
+        for chunk in chunked(entries, BULK_CHUNK):
+            yield from write_chunk(collection, chunk)
+
+    if ndjson:
+        lines = (json.dumps(result) + "\n" for result in results())
+        return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+    return jsonify(list(results()))
+
 # ------------------- RUN APP -------------------
 if __name__ == '__main__':
     app.run(debug=True, host="0.0.0.0", port=5000)
\ No newline at end of file
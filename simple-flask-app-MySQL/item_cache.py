@@ -0,0 +1,222 @@
+"""Cache-aside layer for GET /items/<id>.
+
+ITEM_CACHE              "local" keeps entries in this process, "redis" in a shared Redis,
+                        empty disables the cache (default empty)
+ITEM_CACHE_TTL          seconds an entry is served before it is read again (default 60)
+ITEM_CACHE_SIZE         entries kept by the local cache (default 10000)
+ITEM_CACHE_REDIS_URL    Redis used by the redis cache (default redis://localhost:6379/0)
+
+Readers only add entries that are missing, writers overwrite them with the new row,
+or with a tombstone after a delete. A reader that loaded a row just before a write
+therefore cannot replace the writer's entry with the old row.
+The local cache only sees the writes of its own process, so with several workers
+another worker's write shows up after at most ITEM_CACHE_TTL seconds.
+"""
+from collections import OrderedDict
+import json
+import os
+import threading
+import time
+
+from flask import jsonify
+
+CACHE_TTL = int(os.getenv("ITEM_CACHE_TTL", 60))
+CACHE_SIZE = int(os.getenv("ITEM_CACHE_SIZE", 10000))
+CACHE_REDIS_URL = os.getenv("ITEM_CACHE_REDIS_URL", "redis://localhost:6379/0")
+KEY_PREFIX = "item-cache:"
+
+
+class LocalBackend:
+    """Bounded LRU of JSON strings with a TTL, for one process."""
+
+    name = "local"
+    errors = ()
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def add(self, key, data, ttl):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                return
+            self._store(key, data, ttl)
+
+    def set(self, key, data, ttl):
+        with self.lock:
+            self._store(key, data, ttl)
+
+    def _store(self, key, data, ttl):
+        self.entries[key] = (data, time.monotonic() + ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def size(self):
+        return len(self.entries)
+
+
+class RedisBackend:
+    """JSON strings in Redis, shared by every worker."""
+
+    name = "redis"
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.errors = (redis.exceptions.RedisError,)
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def add(self, key, data, ttl):
+        self.client.set(key, data, ex=ttl, nx=True)
+
+    def set(self, key, data, ttl):
+        self.client.set(key, data, ex=ttl)
+
+    def size(self):
+        return None
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ItemCache:
+    """Cache-aside reads with single-flight loading and hit/latency counters.
+
+    Values must be JSON-serializable; None means "no such item" and is only
+    stored as a tombstone by delete().
+    """
+
+    def __init__(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.flights = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.hit_time = 0.0
+        self.load_time = 0.0
+        self.load_max = 0.0
+
+    def get(self, item_id, load):
+        """Return the item, calling load() on a miss, once per process however many requests wait."""
+        key = KEY_PREFIX + str(item_id)
+        started = time.perf_counter()
+        try:
+            data = self.backend.get(key)
+        except self.backend.errors:
+            data = None
+            self._count_error()
+        if data is not None:
+            with self.lock:
+                self.hits += 1
+                self.hit_time += time.perf_counter() - started
+            return json.loads(data)
+
+        # Single flight: the first request for a missing key loads it, the others wait for its result
+        with self.lock:
+            self.misses += 1
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = load()
+            if flight.value is not None:
+                self._write(self.backend.add, key, flight.value)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                del self.flights[key]
+                self.load_time += elapsed
+                self.load_max = max(self.load_max, elapsed)
+            flight.done.set()
+
+    def set(self, item_id, value):
+        """Replace the entry after a committed write."""
+        self._write(self.backend.set, KEY_PREFIX + str(item_id), value)
+
+    def delete(self, item_id):
+        """Replace the entry with a tombstone after a committed delete."""
+        self._write(self.backend.set, KEY_PREFIX + str(item_id), None)
+
+    def _write(self, method, key, value):
+        try:
+            method(key, json.dumps(value), self.ttl)
+        except self.backend.errors:
+            self._count_error()
+
+    def _count_error(self):
+        with self.lock:
+            self.errors += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            loads = self.misses - self.coalesced
+            return {
+                "backend": self.backend.name,
+                "size": self.backend.size(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "hit_avg_ms": self.hit_time / self.hits * 1000 if self.hits else 0.0,
+                "load_avg_ms": self.load_time / loads * 1000 if loads else 0.0,
+                "load_max_ms": self.load_max * 1000,
+            }
+
+
+def init_item_cache(app):
+    """Create the cache chosen by ITEM_CACHE and expose its counters at GET /metrics/cache."""
+    kind = os.getenv("ITEM_CACHE", "").lower()
+    if not kind:
+        return None
+    if kind == "local":
+        backend = LocalBackend(CACHE_SIZE)
+    elif kind == "redis":
+        backend = RedisBackend(CACHE_REDIS_URL)
+    else:
+        raise ValueError(f"ITEM_CACHE must be 'local' or 'redis', not {kind!r}")
+    cache = ItemCache(backend, CACHE_TTL)
+
+    @app.route("/metrics/cache", methods=["GET"])
+    def cache_metrics():
+        return jsonify(cache.stats())
+
+    return cache
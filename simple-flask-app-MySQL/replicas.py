@@ -0,0 +1,57 @@
+"""Send read-only requests to read replicas and everything else to the primary.
+
+DB_REPLICA_URIS                comma-separated SQLAlchemy URIs of the replicas (default none)
+DB_READ_YOUR_WRITES_SECONDS    after a write, the client's reads stay on the primary
+                               for this long so it sees its own changes (default 5)
+"""
+import itertools
+import os
+import time
+
+from flask import g, has_app_context, request
+from flask_sqlalchemy.session import Session
+
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+PIN_COOKIE = "db_primary_until"
+
+READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", 5))
+
+
+def replica_binds():
+    """Return SQLALCHEMY_BINDS entries for the configured replicas."""
+    uris = [uri.strip() for uri in os.getenv("DB_REPLICA_URIS", "").split(",") if uri.strip()]
+    return {f"replica_{i}": uri for i, uri in enumerate(uris)}
+
+
+class RoutingSession(Session):
+    """Session that uses the replica picked for the current request, if any."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context() and not self._flushing:
+            replica = g.get("db_replica")
+            if replica is not None:
+                return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def init_replica_routing(app, binds):
+    """Round-robin read-only requests across the replicas in binds."""
+    if not binds:
+        return
+    replicas = itertools.cycle(sorted(binds))
+
+    @app.before_request
+    def choose_replica():
+        if request.method not in READ_METHODS:
+            return
+        pinned_until = request.cookies.get(PIN_COOKIE, type=float) or 0
+        if pinned_until > time.time():
+            return
+        g.db_replica = next(replicas)
+
+    @app.after_request
+    def pin_writer_to_primary(response):
+        if request.method not in READ_METHODS and READ_YOUR_WRITES_SECONDS > 0:
+            until = time.time() + READ_YOUR_WRITES_SECONDS
+            response.set_cookie(PIN_COOKIE, str(until), max_age=int(READ_YOUR_WRITES_SECONDS) + 1, httponly=True)
+        return response
@@ -1,7 +1,11 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
+import click
 import redis
 import json
 import uuid
+from itertools import islice
+from read_cache import ReadCache
+import time
 import os
 
 app = Flask(__name__)
@@ -21,53 +25,361 @@ r = redis.Redis(
     decode_responses=True
 )
 
+# Items are hashes under ITEM_PREFIX, ordered by creation time in the ITEM_INDEX sorted set.
+# The index must stay outside ITEM_PREFIX, or it would clash with an item id and every
+# index write would invalidate the read cache.
+ITEM_PREFIX = "items:"
+ITEM_INDEX = "items-index"
+
+# Items fetched per round-trip when walking many items
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", 500))
+MAX_PAGE_SIZE = 1000
+
+# Entries sent to Redis per pipeline by the bulk routes
+BULK_CHUNK = int(os.getenv("BULK_CHUNK", 1000))
+
+# In-process cache for GET /items/<id>, invalidated through Redis client tracking (0 disables it)
+READ_CACHE_SIZE = int(os.getenv("READ_CACHE_SIZE", 10000))
+READ_CACHE_TTL = float(os.getenv("READ_CACHE_TTL", 60))
+
+read_cache = ReadCache(READ_CACHE_SIZE, READ_CACHE_TTL) if READ_CACHE_SIZE > 0 else None
+if read_cache:
+    read_cache.start(r, ITEM_PREFIX)
+
+# ------------------- STORAGE HELPERS -------------------
+
+# Server-side scripts so each mutation is one atomic round-trip
+UPDATE_ITEM = r.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+if #ARGV > 0 then
+    redis.call('HSET', KEYS[1], unpack(ARGV))
+end
+return redis.call('HGETALL', KEYS[1])
+""")
+
+DELETE_ITEM = r.register_script("""
+local fields = redis.call('HGETALL', KEYS[1])
+if #fields == 0 then
+    return false
+end
+redis.call('DEL', KEYS[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+return fields
+""")
+
+def item_key(item_id):
+    return ITEM_PREFIX + item_id
+
+# Hash fields hold JSON so non-string values keep their type
+def encode_fields(fields):
+    return {k: json.dumps(v) for k, v in fields.items()}
+
+def decode_item(item_id, fields):
+    if not fields:
+        return None
+    if isinstance(fields, list):  # HGETALL returned from a script is a flat list
+        fields = dict(zip(fields[::2], fields[1::2]))
+    return {"id": item_id, "name": json.loads(fields["name"]), "value": json.loads(fields["value"])}
+
+# Creation time in microseconds, used as the index score
+def now_score():
+    return time.time_ns() // 1000
+
+# Queue the writes for a new item on a pipeline and return the item
+def add_item(pipe, name, value):
+    item_id = str(uuid.uuid4())  # unique ID
+    pipe.hset(item_key(item_id), mapping=encode_fields({"name": name, "value": value}))
+    pipe.zadd(ITEM_INDEX, {item_id: now_score()})
+    return {"id": item_id, "name": name, "value": value}
+
+# Only the changed fields are written, and only if the item still exists
+def run_update(client, item_id, data):
+    fields = encode_fields({k: data[k] for k in ("name", "value") if k in data})
+    args = [part for pair in fields.items() for part in pair]
+    return UPDATE_ITEM(keys=[item_key(item_id)], args=args, client=client)
+
+def run_delete(client, item_id):
+    return DELETE_ITEM(keys=[item_key(item_id), ITEM_INDEX], args=[item_id], client=client)
+
+# Drop our own cached copy right after a write instead of waiting for the invalidation message
+def forget_cached(item_id):
+    if read_cache:
+        read_cache.invalidate(item_key(item_id))
+
+def encode_cursor(score, item_id):
+    return f"{int(score)}:{item_id}"
+
+def decode_cursor(cursor):
+    score, item_id = cursor.split(":", 1)
+    return int(score), item_id
+
+# Fetch the hashes for a list of ids in one pipelined round-trip
+def load_items(ids):
+    pipe = r.pipeline(transaction=False)
+    for item_id in ids:
+        pipe.hgetall(item_key(item_id))
+    items = [decode_item(item_id, fields) for item_id, fields in zip(ids, pipe.execute())]
+    return [item for item in items if item is not None]
+
+# Next `limit` index entries after the cursor, in creation order
+def index_page(cursor, limit):
+    if cursor is None:
+        return r.zrange(ITEM_INDEX, 0, limit - 1, withscores=True)
+    score, after_id = decode_cursor(cursor)
+    # Entries sharing the cursor's score are ordered by id, so fetch those separately
+    pipe = r.pipeline(transaction=False)
+    pipe.zrangebyscore(ITEM_INDEX, score, score, withscores=True)
+    pipe.zrangebyscore(ITEM_INDEX, f"({score}", "+inf", start=0, num=limit, withscores=True)
+    ties, rest = pipe.execute()
+    return ([(m, s) for m, s in ties if m > after_id] + rest)[:limit]
+
+def list_page(cursor, limit):
+    entries = index_page(cursor, limit)
+    items = load_items([member for member, _ in entries])
+    next_cursor = encode_cursor(entries[-1][1], entries[-1][0]) if len(entries) == limit else None
+    return next_cursor, items
+
+# Walk items in creation order, one batch per round-trip, stopping after limit items
+def iter_items(cursor=None, limit=None):
+    remaining = limit
+    while remaining is None or remaining > 0:
+        cursor, items = list_page(cursor, BATCH_SIZE if remaining is None else min(BATCH_SIZE, remaining))
+        yield from items
+        if remaining is not None:
+            remaining -= len(items)
+        if cursor is None:
+            return
+
+# Write items as they are fetched, as a chunked JSON array or NDJSON
+def stream_items(cursor, limit, fmt):
+    if fmt == "ndjson":
+        def generate():
+            for item in iter_items(cursor, limit):
+                yield json.dumps(item) + "\n"
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    def generate():
+        yield "["
+        first = True
+        for item in iter_items(cursor, limit):
+            yield ("" if first else ",") + json.dumps(item)
+            first = False
+        yield "]"
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
 # ------------------- CRUD ROUTES -------------------
 
 # Create
 @app.route("/items", methods=["POST"])
 def create_item():
     data = request.get_json()
-    item_id = str(uuid.uuid4())  # unique ID
-    item = {"id": item_id, "name": data.get("name", ""), "value": data.get("value", "")}
-    r.set(item_id, json.dumps(item))
+    pipe = r.pipeline()
+    item = add_item(pipe, data.get("name", ""), data.get("value", ""))
+    pipe.execute()
     return jsonify(item), 201
 
 # Read all
 @app.route("/items", methods=["GET"])
 def get_items():
-    keys = r.keys()
-    items = [json.loads(r.get(k)) for k in keys]
-    return jsonify(items)
+    cursor = request.args.get("cursor")
+    limit = request.args.get("limit", type=int)
+    stream = request.args.get("stream")
+
+    if limit is not None and limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    if cursor is not None:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+    if stream:
+        if stream not in ("json", "ndjson"):
+            return jsonify({"error": "stream must be 'json' or 'ndjson'"}), 400
+        return stream_items(cursor, limit, stream)
+
+    if limit is None and cursor is None:
+        return jsonify(list(iter_items()))
+
+    next_cursor, page = list_page(cursor, min(limit or MAX_PAGE_SIZE, MAX_PAGE_SIZE))
+    response = jsonify(page)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+# Read cache statistics
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    if not read_cache:
+        return jsonify({"error": "Read cache is disabled"}), 404
+    return jsonify(read_cache.stats())
+
+# Count
+@app.route("/items/count", methods=["GET"])
+def count_items():
+    return jsonify({"count": r.zcard(ITEM_INDEX)})
 
 # Read one
 @app.route("/items/<string:item_id>", methods=["GET"])
 def get_item(item_id):
-    item = r.get(item_id)
+    key = item_key(item_id)
+    item, token = read_cache.get(key) if read_cache else (None, None)
+    if item is None:
+        item = decode_item(item_id, r.hgetall(key))
+        if token is not None:
+            read_cache.put(key, token, item)
     if not item:
         return jsonify({"error": "Item not found"}), 404
-    return jsonify(json.loads(item))
+    return jsonify(item)
 
 # Update
 @app.route("/items/<string:item_id>", methods=["PUT"])
 def update_item(item_id):
-    item = r.get(item_id)
+    data = request.get_json()
+    item = decode_item(item_id, run_update(r, item_id, data))
+    forget_cached(item_id)
     if not item:
         return jsonify({"error": "Item not found"}), 404
-    data = request.get_json()
-    item = json.loads(item)
-    item["name"] = data.get("name", item["name"])
-    item["value"] = data.get("value", item["value"])
-    r.set(item_id, json.dumps(item))
     return jsonify(item)
 
 # Delete
 @app.route("/items/<string:item_id>", methods=["DELETE"])
 def delete_item(item_id):
-    item = r.get(item_id)
+    item = decode_item(item_id, run_delete(r, item_id))
+    forget_cached(item_id)
     if not item:
         return jsonify({"error": "Item not found"}), 404
-    r.delete(item_id)
-    return jsonify(json.loads(item))
+    return jsonify(item)
+
+# ------------------- BULK ROUTES -------------------
+
+INVALID_ENTRY = object()
+
+# Entries from a JSON array body, or one per line from an NDJSON body without buffering it
+def read_bulk_body():
+    if request.mimetype == "application/x-ndjson":
+        def entries():
+            for line in request.stream:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield INVALID_ENTRY
+        return entries(), True
+    data = request.get_json()
+    if not isinstance(data, list):
+        return None, False
+    return iter(data), False
+
+def chunked(entries, size):
+    while True:
+        chunk = list(islice(entries, size))
+        if not chunk:
+            return
+        yield chunk
+
+# Run each chunk of entries through one pipeline and answer in the request's format
+def bulk_response(queue_entry, build_result, ids_only=False):
+    entries, ndjson = read_bulk_body()
+    if entries is None:
+        return jsonify({"error": "Body must be a JSON array or NDJSON"}), 400
+
+    def results():
+        for chunk in chunked(entries, BULK_CHUNK):
+            pipe = r.pipeline(transaction=False)
+            queued = []
+            for entry in chunk:
+                if ids_only and isinstance(entry, str):
+                    entry = {"id": entry}
+                if not isinstance(entry, dict):
+                    queued.append(None)
+                    continue
+                queued.append((entry, queue_entry(pipe, entry)))
+            replies = iter(pipe.execute())
+            for slot in queued:
+                if slot is None:
+                    yield {"status": 400, "error": "Each entry must be a JSON object"}
+                else:
+                    yield build_result(*slot, replies)
+
+    if ndjson:
+        lines = (json.dumps(result) + "\n" for result in results())
+        return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+    return jsonify(list(results()))
+
+# Result for an update or delete entry, taking the script reply if one was queued
+def mutation_result(entry, replies):
+    item_id = entry.get("id")
+    if not isinstance(item_id, str):
+        return {"status": 400, "error": "Each entry needs a string id"}
+    item = decode_item(item_id, next(replies))
+    forget_cached(item_id)
+    if not item:
+        return {"id": item_id, "status": 404, "error": "Item not found"}
+    return {"id": item_id, "status": 200, "item": item}
+
+# Bulk create
+@app.route("/items/bulk", methods=["POST"])
+def bulk_create_items():
+    def queue_entry(pipe, entry):
+        return add_item(pipe, entry.get("name", ""), entry.get("value", ""))
+
+    def build_result(entry, item, replies):
+        next(replies), next(replies)  # HSET and ZADD
+        return {"id": item["id"], "status": 201, "item": item}
+
+    return bulk_response(queue_entry, build_result)
+
+# Bulk update
+@app.route("/items/bulk", methods=["PATCH"])
+def bulk_update_items():
+    def queue_entry(pipe, entry):
+        if isinstance(entry.get("id"), str):
+            run_update(pipe, entry["id"], entry)
+
+    return bulk_response(queue_entry, lambda entry, _, replies: mutation_result(entry, replies))
+
+# Bulk delete
+@app.route("/items/bulk", methods=["DELETE"])
+def bulk_delete_items():
+    def queue_entry(pipe, entry):
+        if isinstance(entry.get("id"), str):
+            run_delete(pipe, entry["id"])
+
+    return bulk_response(queue_entry, lambda entry, _, replies: mutation_result(entry, replies), ids_only=True)
+
+# ------------------- MIGRATION -------------------
+
+# Convert items stored as bare JSON strings (the old layout) into hashes plus index entries
+@app.cli.command("migrate-items")
+@click.option("--batch-size", default=1000, show_default=True, help="Keys converted per round-trip.")
+def migrate_items(batch_size):
+    cursor = 0
+    migrated = 0
+    score = now_score()
+    while True:
+        cursor, keys = r.scan(cursor=cursor, count=batch_size, _type="string")
+        values = r.mget(keys) if keys else []
+        pipe = r.pipeline()
+        for key, raw in zip(keys, values):
+            try:
+                item = json.loads(raw) if raw is not None else None
+            except ValueError:
+                continue
+            if not isinstance(item, dict) or item.get("id") != key:
+                continue  # not an item written by the old layout
+            pipe.hset(item_key(key), mapping=encode_fields({"name": item.get("name", ""), "value": item.get("value", "")}))
+            pipe.zadd(ITEM_INDEX, {key: score})
+            pipe.delete(key)
+            score += 1
+            migrated += 1
+        pipe.execute()
+        print(f"Migrated {migrated} items")
+        if cursor == 0:
+            break
 
 # ------------------- RUN APP -------------------
 if __name__ == "__main__":
@@ -0,0 +1,95 @@
+"""Compare throughput and lost updates of read-modify-write vs the update script.
+
+Usage: python bench_contention.py [--pairs 8] [--rounds 500]
+
+Each pair of threads shares one item. In every round one thread changes the
+name and the other changes the value at the same moment, then the item is
+checked: if either change is missing, an update was lost.
+Needs the same REDIS_* environment variables as the app.
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+
+from app import r, run_update, item_key, encode_fields, decode_item
+
+
+# The old layout: GET the JSON document, change one field in Python, SET it back
+def legacy_update(item_id, field, value):
+    item = json.loads(r.get(item_id))
+    item[field] = value
+    r.set(item_id, json.dumps(item))
+
+
+def legacy_read(item_id):
+    return json.loads(r.get(item_id))
+
+
+def legacy_setup(item_id):
+    r.set(item_id, json.dumps({"id": item_id, "name": "", "value": ""}))
+
+
+def script_update(item_id, field, value):
+    run_update(r, item_id, {field: value})
+
+
+def script_read(item_id):
+    return decode_item(item_id, r.hgetall(item_key(item_id)))
+
+
+def script_setup(item_id):
+    r.hset(item_key(item_id), mapping=encode_fields({"name": "", "value": ""}))
+
+
+def run(setup, update, read, pairs, rounds):
+    lost = 0
+    lost_lock = threading.Lock()
+
+    def writer(item_id, field, barrier, done):
+        nonlocal lost
+        for i in range(rounds):
+            barrier.wait()
+            update(item_id, field, f"{field}-{i}")
+            if done.wait() == 0:
+                item = read(item_id)
+                missing = (item["name"] != f"name-{i}") + (item["value"] != f"value-{i}")
+                if missing:
+                    with lost_lock:
+                        lost += missing
+
+    threads = []
+    item_ids = []
+    for _ in range(pairs):
+        item_id = f"bench-{uuid.uuid4()}"
+        item_ids.append(item_id)
+        setup(item_id)
+        barrier, done = threading.Barrier(2), threading.Barrier(2)
+        threads.append(threading.Thread(target=writer, args=(item_id, "name", barrier, done)))
+        threads.append(threading.Thread(target=writer, args=(item_id, "value", barrier, done)))
+
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    r.delete(*item_ids, *[item_key(item_id) for item_id in item_ids])
+    return pairs * rounds * 2 / elapsed, lost
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pairs", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    total = args.pairs * args.rounds * 2
+    for label, fns in (
+        ("GET + SET (before)", (legacy_setup, legacy_update, legacy_read)),
+        ("Lua script (after)", (script_setup, script_update, script_read)),
+    ):
+        ops, lost = run(*fns, args.pairs, args.rounds)
+        print(f"{label}: {ops:,.0f} updates/s, {lost} of {total} updates lost")
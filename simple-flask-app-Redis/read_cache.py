@@ -0,0 +1,133 @@
+from collections import OrderedDict
+import threading
+import time
+
+from redis.exceptions import RedisError
+
+INVALIDATE_CHANNEL = "__redis__:invalidate"
+
+
+class ReadCache:
+    """Bounded LRU cache with a TTL, kept correct by Redis invalidation messages.
+
+    A value is only served while the cache is connected to the invalidation
+    stream. Each miss gets its own token, and the value fetched for it is only
+    stored if that token is still the pending one for the key, so a fetch that
+    an invalidation or a newer miss overtook is dropped.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.connected = False
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return (value, None) on a hit, or (None, token) after registering a pending fetch."""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key) if self.connected else None
+            if entry is not None and entry[1] > now:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], None
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            token = object()
+            self.pending[key] = token
+            return None, token
+
+    def put(self, key, token, value):
+        """Store the value fetched for the miss that returned token."""
+        with self.lock:
+            if self.pending.get(key) is not token:
+                return  # invalidated or superseded while fetching, so the value may be stale
+            del self.pending[key]
+            if not self.connected or value is None:
+                return
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+            self.pending.pop(key, None)
+            self.invalidations += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.pending.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "connected": self.connected,
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+    # ------------------- INVALIDATION LISTENER -------------------
+
+    def start(self, client, prefix):
+        """Follow server-assisted invalidations for keys under prefix in a background thread."""
+        threading.Thread(target=self._listen, args=(client, prefix), daemon=True).start()
+
+    def _listen(self, client, prefix):
+        while True:
+            listener = tracker = None
+            try:
+                # RESP2 needs the invalidations redirected to a separate subscribed connection
+                listener = client.connection_pool.make_connection()
+                listener.send_command("CLIENT", "ID")
+                listener_id = listener.read_response()
+                listener.send_command("SUBSCRIBE", INVALIDATE_CHANNEL)
+                listener.read_response()
+
+                # Broadcast mode reports every write under the prefix, whoever made it
+                tracker = client.connection_pool.make_connection()
+                tracker.send_command("CLIENT", "TRACKING", "on", "REDIRECT", listener_id, "BCAST", "PREFIX", prefix)
+                tracker.read_response()
+
+                self.clear()
+                self.connected = True
+                print("Read cache connected to Redis invalidations")
+                while True:
+                    if listener.can_read(timeout=5):
+                        self._handle(listener.read_response())
+                    else:
+                        # Make sure tracking is still on while nothing is being written
+                        tracker.send_command("PING")
+                        tracker.read_response()
+            except (RedisError, OSError) as e:
+                print(f"Read cache disconnected from Redis invalidations: {e}")
+            finally:
+                self.connected = False
+                self.clear()
+                for conn in (listener, tracker):
+                    if conn is not None:
+                        conn.disconnect()
+            time.sleep(1)
+
+    def _handle(self, message):
+        if message[0] != "message":
+            return
+        keys = message[2]
+        if keys is None:  # FLUSHDB / FLUSHALL
+            self.clear()
+            return
+        for key in keys:
+            self.invalidate(key)
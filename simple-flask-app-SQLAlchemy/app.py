@@ -1,26 +1,234 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy import event
+from db_config import engine_options, register_pool_metrics
+import csv
+import json
+import os
 
 app = Flask(__name__)
 
-# SQLite database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///items.db'
+# SQLite database configuration (a relative path lives in the instance folder)
+SQLITE_DB = os.getenv("SQLITE_DB", "items.db")
+app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{SQLITE_DB}"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 
 db = SQLAlchemy(app)
+register_pool_metrics(app, db)
 
 # Database model
 class Item(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     value = db.Column(db.String(100), nullable=True)
+    # Change counter value committed by the last write to this row, served as its ETag
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        db.Index("ix_item_name_id", "name", "id"),
+        db.Index("ix_item_value_id", "value", "id"),
+    )
 
     def to_dict(self):
         return {"id": self.id, "name": self.name, "value": self.value}
 
+# Core table used by the single-statement write paths
+items_table = Item.__table__
+# Read paths select these as plain row tuples, skipping ORM instances and the identity map
+ITEM_COLUMNS = (items_table.c.id, items_table.c.name, items_table.c.value)
+
+# One-row counter bumped by every committed write, served as the ETag of the whole collection.
+# Rows written in a transaction take the value it commits with, so versions never repeat
+item_changes = db.Table(
+    "item_changes",
+    db.Column("id", db.Integer, primary_key=True),
+    db.Column("counter", db.BigInteger, nullable=False),
+)
+
+# ------------------- SQLITE TUNING -------------------
+
+# "production" turns on WAL and the pragmas below, "default" leaves SQLite as it is
+SQLITE_MODE = os.getenv("SQLITE_MODE", "production")
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",  # readers no longer block behind a writer
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 268435456)),
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", 65536)),  # negative means KiB
+}
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # Let SQLAlchemy emit BEGIN itself instead of the sqlite3 module's implicit transactions
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+def begin_transaction(conn):
+    # Writers take the write lock up front, so they wait on busy_timeout instead of
+    # failing with "database is locked" when a read transaction tries to upgrade
+    if has_request_context() and request.method in ("GET", "HEAD"):
+        conn.exec_driver_sql("BEGIN")
+    else:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+# Each request thread checks out its own pooled connection through its own session
+if SQLITE_MODE == "production":
+    with app.app_context():
+        event.listen(db.engine, "connect", set_sqlite_pragmas)
+        event.listen(db.engine, "begin", begin_transaction)
+
+# External-content FTS5 index over name and value, kept in sync with the item table by triggers
+ITEMS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(name, value, content='item', content_rowid='id')",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON item BEGIN
+        INSERT INTO items_fts(rowid, name, value) VALUES (new.id, new.name, new.value);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON item BEGIN
+        INSERT INTO items_fts(items_fts, rowid, name, value) VALUES ('delete', old.id, old.name, old.value);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE OF name, value ON item BEGIN
+        INSERT INTO items_fts(items_fts, rowid, name, value) VALUES ('delete', old.id, old.name, old.value);
+        INSERT INTO items_fts(rowid, name, value) VALUES (new.id, new.name, new.value);
+    END""",
+)
+
 # Initialize the database
 with app.app_context():
     db.create_all()
+    if db.session.execute(db.text("SELECT 1 FROM sqlite_master WHERE name = 'items_fts'")).first() is None:
+        for statement in ITEMS_FTS_DDL:
+            db.session.execute(db.text(statement))
+        # Index the rows of a database created before the search table existed
+        db.session.execute(db.text("INSERT INTO items_fts(items_fts) VALUES ('rebuild')"))
+        db.session.commit()
+    if db.session.execute(db.select(item_changes.c.counter)).first() is None:
+        try:
+            db.session.execute(db.insert(item_changes).values(id=1, counter=0))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()  # another worker seeded it first
+
+MAX_PAGE_SIZE = 1000
+# Rows fetched per round-trip from the server-side cursor when streaming
+STREAM_BATCH = int(os.getenv("STREAM_BATCH", 1000))
+
+# ------------------- VERSIONING -------------------
+
+def collection_version():
+    return db.session.scalar(db.select(item_changes.c.counter))
+
+# Version for a row being written, read inside the write statement itself. SQLite runs one
+# write transaction at a time, so no other transaction can commit with the same counter value
+def row_version():
+    return db.select(item_changes.c.counter + 1).scalar_subquery()
+
+# The last statement before each commit of a write
+def bump_collection():
+    db.session.execute(db.update(item_changes).values(counter=item_changes.c.counter + 1))
+
+# WHERE clauses for a write to item_id; with If-Match the item must still be at a listed version
+def item_match(item_id):
+    conditions = [items_table.c.id == item_id]
+    if request.if_match and not request.if_match.star_tag:
+        versions = [int(tag) for tag in request.if_match.as_set() if tag.isdigit()]
+        conditions.append(items_table.c.version.in_(versions))
+    return conditions
+
+def with_etag(response, version):
+    response.set_etag(str(version))
+    return response
+
+def not_modified(version):
+    return with_etag(Response(status=304), version)
+
+# A conditional write matched nothing: the item is gone or at another version
+def missing_or_conflict(item_id):
+    version = db.session.scalar(db.select(items_table.c.version).where(items_table.c.id == item_id))
+    if version is None:
+        return jsonify({"error": "Item not found"}), 404
+    return with_etag(jsonify({"error": "Item was changed by another request"}), version), 412
+
+# ------------------- FILTERS -------------------
+
+# ORDER BY for each sort key; the id tie-breaker keeps pages stable and matches the indexes
+SORT_ORDERS = {
+    "id": (items_table.c.id,),
+    "-id": (items_table.c.id.desc(),),
+    "name": (items_table.c.name, items_table.c.id),
+    "-name": (items_table.c.name.desc(), items_table.c.id.desc()),
+    "value": (items_table.c.value, items_table.c.id),
+    "-value": (items_table.c.value.desc(), items_table.c.id.desc()),
+}
+
+# WHERE clauses for the name, name_prefix, value and q filters, each answered from an index
+def item_filters():
+    args = request.args
+    conditions = []
+    if "name" in args:
+        conditions.append(items_table.c.name == args["name"])
+    if args.get("name_prefix"):
+        conditions.append(name_prefix_match(args["name_prefix"]))
+    if "value" in args:
+        conditions.append(items_table.c.value == args["value"])
+    words = args.get("q", "").split()
+    if words:
+        conditions.append(search_match(words))
+    return conditions
+
+# SQLite only turns a prefix into an index range for case-sensitive matches, so use
+# GLOB (like the BINARY index on name) instead of the case-insensitive LIKE
+def name_prefix_match(prefix):
+    escaped = "".join(f"[{c}]" if c in "*?[" else c for c in prefix)
+    return items_table.c.name.op("GLOB")(escaped + "*")
+
+# Every word must appear in name or value; answered from the FTS5 table
+def search_match(words):
+    query = " ".join('"' + word.replace('"', '""') + '"' for word in words)
+    matches = db.text("SELECT rowid FROM items_fts WHERE items_fts MATCH :query").bindparams(query=query)
+    return items_table.c.id.in_(matches.columns(db.column("rowid")))
+
+# ------------------- LISTING HELPERS -------------------
+
+# Walk the table in id order through a server-side cursor, one batch at a time, stopping after limit rows
+def iter_items(after_id=0, filters=(), limit=None):
+    query = (
+        db.select(*ITEM_COLUMNS)
+        .where(items_table.c.id > after_id, *filters)
+        .order_by(items_table.c.id)
+        .limit(limit)
+        .execution_options(yield_per=STREAM_BATCH)
+    )
+    for row in db.session.execute(query):
+        yield row_to_dict(row)
+
+def row_to_dict(row):
+    return {"id": row[0], "name": row[1], "value": row[2]}
+
+# Encode row tuples straight to a JSON array response
+def rows_response(rows):
+    body = json.dumps([{"id": id, "name": name, "value": value} for id, name, value in rows])
+    return Response(body, mimetype="application/json")
+
+# Write rows as they arrive, as a chunked JSON array or NDJSON
+def stream_items(after_id, fmt, filters=(), limit=None):
+    if fmt == "ndjson":
+        def generate():
+            for item in iter_items(after_id, filters, limit):
+                yield json.dumps(item) + "\n"
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    def generate():
+        yield "["
+        first = True
+        for item in iter_items(after_id, filters, limit):
+            yield ("" if first else ",") + json.dumps(item)
+            first = False
+        yield "]"
+    return Response(stream_with_context(generate()), mimetype="application/json")
 
 # ------------------- CRUD ROUTES -------------------
 
@@ -28,46 +236,195 @@ with app.app_context():
 @app.route('/items', methods=['POST'])
 def create_item():
     data = request.get_json()
-    item = Item(name=data.get("name", ""), value=data.get("value", ""))
-    db.session.add(item)
+    # One INSERT ... RETURNING instead of an ORM flush and a refresh after commit
+    stmt = (
+        db.insert(items_table)
+        .values(name=data.get("name", ""), value=data.get("value", ""), version=row_version())
+        .returning(*ITEM_COLUMNS, items_table.c.version)
+    )
+    row = db.session.execute(stmt).first()
+    bump_collection()
     db.session.commit()
-    return jsonify(item.to_dict()), 201
+    return with_etag(jsonify(row_to_dict(row)), row.version), 201
 
 # Read all
 @app.route('/items', methods=['GET'])
 def get_items():
-    items = Item.query.all()
-    return jsonify([item.to_dict() for item in items])
+    after_id = request.args.get("after_id", 0, type=int)
+    limit = request.args.get("limit", type=int)
+    stream = request.args.get("stream")
+    sort = request.args.get("sort", "id")
+
+    if limit is not None and limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+
+    if stream and stream not in ("json", "ndjson"):
+        return jsonify({"error": "stream must be 'json' or 'ndjson'"}), 400
+
+    if sort not in SORT_ORDERS:
+        return jsonify({"error": f"sort must be one of {', '.join(SORT_ORDERS)}"}), 400
+    if sort != "id" and (stream or "after_id" in request.args):
+        return jsonify({"error": "after_id and stream only work with sort=id"}), 400
+
+    filters = item_filters()
+
+    # Read the counter before the rows, so the ETag is never newer than the body
+    version = collection_version()
+    if request.if_none_match.contains_weak(str(version)):
+        return not_modified(version)
+
+    if stream:
+        return with_etag(stream_items(after_id, stream, filters, limit), version)
+
+    if limit is None and "after_id" not in request.args and not filters and "sort" not in request.args:
+        return with_etag(rows_response(db.session.execute(db.select(*ITEM_COLUMNS)).all()), version)
+
+    # Keyset pagination: seek past the last id seen instead of counting an OFFSET
+    limit = min(limit or MAX_PAGE_SIZE, MAX_PAGE_SIZE)
+    query = db.select(*ITEM_COLUMNS).where(*filters)
+    if sort == "id":
+        query = query.where(items_table.c.id > after_id)
+    rows = db.session.execute(query.order_by(*SORT_ORDERS[sort]).limit(limit)).all()
+    response = with_etag(rows_response(rows), version)
+    if sort == "id" and len(rows) == limit:
+        response.headers["X-Next-Cursor"] = str(rows[-1][0])
+    return response
 
 # Read one
 @app.route('/items/<int:item_id>', methods=['GET'])
 def get_item(item_id):
-    item = Item.query.get(item_id)
-    if not item:
+    row = db.session.execute(db.select(*ITEM_COLUMNS, items_table.c.version).where(items_table.c.id == item_id)).first()
+    if row is None:
         return jsonify({"error": "Item not found"}), 404
-    return jsonify(item.to_dict())
+    if request.if_none_match.contains_weak(str(row.version)):
+        return not_modified(row.version)
+    return with_etag(jsonify(row_to_dict(row)), row.version)
 
 # Update
 @app.route('/items/<int:item_id>', methods=['PUT'])
 def update_item(item_id):
-    item = Item.query.get(item_id)
-    if not item:
-        return jsonify({"error": "Item not found"}), 404
     data = request.get_json()
-    item.name = data.get("name", item.name)
-    item.value = data.get("value", item.value)
+    values = {k: data[k] for k in ("name", "value") if k in data}
+    columns = (*ITEM_COLUMNS, items_table.c.version)
+    if values:
+        # One UPDATE ... RETURNING checks If-Match and writes under the same write lock
+        stmt = (
+            db.update(items_table)
+            .where(*item_match(item_id))
+            .values(**values, version=row_version())
+            .returning(*columns)
+        )
+    else:
+        stmt = db.select(*columns).where(*item_match(item_id))
+    row = db.session.execute(stmt).first()
+    if row is None:
+        db.session.rollback()
+        return missing_or_conflict(item_id)
+    if values:
+        bump_collection()
     db.session.commit()
-    return jsonify(item.to_dict())
+    return with_etag(jsonify(row_to_dict(row)), row.version)
 
 # Delete
 @app.route('/items/<int:item_id>', methods=['DELETE'])
 def delete_item(item_id):
-    item = Item.query.get(item_id)
-    if not item:
+    # One DELETE ... RETURNING statement hands back the removed row
+    stmt = db.delete(items_table).where(items_table.c.id == item_id).returning(*ITEM_COLUMNS)
+    row = db.session.execute(stmt).first()
+    if row is None:
+        db.session.rollback()
         return jsonify({"error": "Item not found"}), 404
-    db.session.delete(item)
+    bump_collection()
     db.session.commit()
-    return jsonify(item.to_dict())
+    return jsonify(row_to_dict(row))
+
+# ------------------- BULK IMPORT -------------------
+
+# Rows sent to the database per statement, and rows per transaction
+IMPORT_BATCH = int(os.getenv("IMPORT_BATCH", 1000))
+IMPORT_COMMIT_SIZE = int(os.getenv("IMPORT_COMMIT_SIZE", 10000))
+
+def import_field(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, bool)):
+        return str(value)
+    raise ValueError("name and value must be strings or numbers")
+
+# Yield (line, row or error message) from an NDJSON or CSV body, reading it as it arrives
+def read_import_rows():
+    lines = (raw.decode("utf-8") for raw in request.stream)
+    if request.mimetype == "text/csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line, text in enumerate(lines, start=1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError:
+            yield line, "Invalid JSON"
+            continue
+        yield line, record if isinstance(record, dict) else "Each line must be a JSON object"
+
+def to_import_row(record):
+    name = import_field(record.get("name", ""))
+    if name is None:
+        raise ValueError("name is required")
+    row = {"name": name, "value": import_field(record.get("value", ""))}
+    for key, text in row.items():
+        length = items_table.c[key].type.length
+        if text is not None and len(text) > length:
+            raise ValueError(f"{key} is longer than {length} characters")
+    return row
+
+# Multi-row INSERT ... RETURNING, batched by SQLAlchemy's executemany path
+def insert_batch(rows):
+    version = db.session.scalar(db.select(row_version()))
+    stmt = db.insert(items_table).returning(items_table.c.id, sort_by_parameter_order=True)
+    return list(db.session.scalars(stmt, [dict(row, version=version) for row in rows]))
+
+# Bulk import
+@app.route('/items/import', methods=['POST'])
+def import_items():
+    if request.mimetype not in ("application/x-ndjson", "text/csv"):
+        return jsonify({"error": "Body must be NDJSON (application/x-ndjson) or CSV (text/csv)"}), 415
+
+    committed, pending, errors, batch = [], [], [], []
+    try:
+        for line, record in read_import_rows():
+            try:
+                if isinstance(record, str):
+                    raise ValueError(record)
+                batch.append(to_import_row(record))
+            except ValueError as e:
+                errors.append({"line": line, "error": str(e)})
+                continue
+            if len(batch) >= IMPORT_BATCH:
+                pending.extend(insert_batch(batch))
+                batch = []
+                if len(pending) >= IMPORT_COMMIT_SIZE:
+                    bump_collection()
+                    db.session.commit()
+                    committed.extend(pending)
+                    pending = []
+        if batch:
+            pending.extend(insert_batch(batch))
+        if pending:
+            bump_collection()
+            db.session.commit()
+            committed.extend(pending)
+    except SQLAlchemyError as e:
+        # Rows since the last commit are rolled back, report the ones that made it
+        db.session.rollback()
+        print(f"Import failed after {len(committed)} committed rows: {e}")
+        return jsonify({
+            "error": "Database error, rows after the last commit were not imported",
+            "imported": len(committed), "failed": len(errors), "ids": committed, "errors": errors,
+        }), 500
+    return jsonify({"imported": len(committed), "failed": len(errors), "ids": committed, "errors": errors}), 201
 
 # ------------------- RUN APP -------------------
 if __name__ == '__main__':
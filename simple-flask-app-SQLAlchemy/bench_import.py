@@ -0,0 +1,58 @@
+"""Compare rows/sec of one POST /items per row against POST /items/import.
+
+Usage: python bench_import.py [--url http://localhost:5000] [--rows 10000]
+
+Run it against a running app; it adds 2 x rows items to the table.
+"""
+import argparse
+import http.client
+import json
+import time
+from urllib.parse import urlparse
+
+
+def connect(url):
+    parsed = urlparse(url)
+    return http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=600)
+
+
+def per_request(url, rows):
+    conn = connect(url)
+    started = time.perf_counter()
+    for i in range(rows):
+        conn.request("POST", "/items", json.dumps({"name": f"item-{i}", "value": str(i)}),
+                     {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        if response.status != 201:
+            raise RuntimeError(f"POST /items returned {response.status}")
+    return rows / (time.perf_counter() - started)
+
+
+def bulk_import(url, rows):
+    def body():
+        for i in range(rows):
+            yield (json.dumps({"name": f"item-{i}", "value": str(i)}) + "\n").encode("utf-8")
+
+    conn = connect(url)
+    started = time.perf_counter()
+    conn.request("POST", "/items/import", body(),
+                 {"Content-Type": "application/x-ndjson", "Transfer-Encoding": "chunked"},
+                 encode_chunked=True)
+    response = conn.getresponse()
+    result = json.loads(response.read())
+    if response.status != 201:
+        raise RuntimeError(f"POST /items/import returned {response.status}")
+    return result["imported"] / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    single = per_request(args.url, args.rows)
+    print(f"POST /items:        {single:,.0f} rows/s")
+    bulk = bulk_import(args.url, args.rows)
+    print(f"POST /items/import: {bulk:,.0f} rows/s ({bulk / single:.0f}x)")
@@ -0,0 +1,53 @@
+"""Compare CPU time per 10k rows of ORM instances + to_dict against the Core row-tuple path.
+
+Usage: python bench_serialize.py [--rows 10000] [--repeat 5]
+
+Runs inside the app's process against the configured database and adds rows
+until the table holds at least --rows items. Each round reads the first
+--rows items and encodes them to JSON; the best round of each path is shown.
+"""
+import argparse
+import json
+import time
+
+from app import app, db, Item, ITEM_COLUMNS, items_table
+
+
+def orm_path(rows):
+    items = db.session.scalars(db.select(Item).order_by(Item.id).limit(rows)).all()
+    return json.dumps([item.to_dict() for item in items])
+
+
+def core_path(rows):
+    query = db.select(*ITEM_COLUMNS).order_by(items_table.c.id).limit(rows)
+    result = db.session.execute(query).all()
+    return json.dumps([{"id": id, "name": name, "value": value} for id, name, value in result])
+
+
+def cpu_ms(fn, rows, repeat):
+    best = None
+    for _ in range(repeat):
+        db.session.remove()  # start every round with an empty identity map
+        started = time.process_time()
+        fn(rows)
+        elapsed = time.process_time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000 * 10000 / rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with app.app_context():
+        missing = args.rows - db.session.scalar(db.select(db.func.count()).select_from(items_table))
+        if missing > 0:
+            db.session.execute(db.insert(items_table), [{"name": f"item-{i}", "value": str(i)} for i in range(missing)])
+            db.session.commit()
+
+        orm = cpu_ms(orm_path, args.rows, args.repeat)
+        core = cpu_ms(core_path, args.rows, args.repeat)
+        print(f"ORM + to_dict: {orm:,.1f} ms CPU per 10k rows")
+        print(f"Core tuples:   {core:,.1f} ms CPU per 10k rows ({orm / core:.1f}x less)")
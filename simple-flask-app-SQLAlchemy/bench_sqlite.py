@@ -0,0 +1,119 @@
+"""Compare a mixed read/write workload with SQLite's defaults against SQLITE_MODE=production.
+
+Usage: python bench_sqlite.py [--processes 4] [--threads 4] [--seconds 10] [--write-ratio 0.2]
+
+Each mode runs on a fresh temporary database. A first process creates and seeds
+it, then --processes worker processes, like the workers of `gunicorn -w N`, open
+the same file at once. Each sends requests from --threads threads through its own
+copy of the app: mostly GET /items/<id>, with the given share of POST /items and
+PUT /items/<id>. Separate processes contend for SQLite's file locks the way
+separate server workers do. Requests that fail (for example with "database is
+locked") are counted as errors.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SEED_ROWS = 1000
+
+
+def seed():
+    from app import app
+
+    client = app.test_client()
+    for i in range(SEED_ROWS):
+        client.post("/items", json={"name": f"item-{i}", "value": str(i)})
+
+
+def worker(threads, start, seconds, write_ratio):
+    from app import app
+
+    reads = writes = errors = 0
+    lock = threading.Lock()
+    # Every process starts at the same moment, after all of them have imported the app
+    time.sleep(max(start - time.time(), 0))
+    deadline = time.perf_counter() + seconds
+
+    def run():
+        nonlocal reads, writes, errors
+        client = app.test_client()
+        rng = random.Random()
+        counts = [0, 0, 0]
+        while time.perf_counter() < deadline:
+            item_id = rng.randint(1, SEED_ROWS)
+            try:
+                if rng.random() >= write_ratio:
+                    ok = client.get(f"/items/{item_id}").status_code == 200
+                    kind = 0
+                elif rng.random() < 0.5:
+                    ok = client.post("/items", json={"name": "new", "value": "x"}).status_code == 201
+                    kind = 1
+                else:
+                    ok = client.put(f"/items/{item_id}", json={"value": str(rng.random())}).status_code == 200
+                    kind = 1
+            except Exception:
+                ok = False
+            counts[kind if ok else 2] += 1
+        with lock:
+            reads += counts[0]
+            writes += counts[1]
+            errors += counts[2]
+
+    pool = [threading.Thread(target=run) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    print(json.dumps({"reads": reads, "writes": writes, "errors": errors}))
+
+
+def run_mode(mode, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, SQLITE_MODE=mode, SQLITE_DB=os.path.join(tmp, "bench.db"))
+        subprocess.run([sys.executable, __file__, "--seed"], env=env, check=True, capture_output=True)
+        start = time.time() + 2 + args.processes * 0.5
+        workers = [
+            subprocess.Popen(
+                [sys.executable, __file__, "--worker", "--threads", str(args.threads), "--start", str(start),
+                 "--seconds", str(args.seconds), "--write-ratio", str(args.write_ratio)],
+                env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+            )
+            for _ in range(args.processes)
+        ]
+        total = {"reads": 0, "writes": 0, "errors": 0}
+        for process in workers:
+            output, _ = process.communicate()
+            result = json.loads(output.strip().splitlines()[-1])
+            for key in total:
+                total[key] += result[key]
+    print(f"{mode:<10}: {total['reads'] / args.seconds:,.0f} reads/s, "
+          f"{total['writes'] / args.seconds:,.0f} writes/s, {total['errors']} errors")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--seed", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--start", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed()
+        sys.exit()
+    if args.worker:
+        worker(args.threads, args.start, args.seconds, args.write_ratio)
+        sys.exit()
+
+    print(f"{args.processes} processes x {args.threads} threads, {args.write_ratio:.0%} writes")
+    for mode in ("default", "production"):
+        run_mode(mode, args)
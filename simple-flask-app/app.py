@@ -1,34 +1,78 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
+from store import create_store, ItemTooLargeError, StoreFullError
+import json
 
 app = Flask(__name__)
 
-# In-memory data store
-items = {}
-next_id = 1
+# Item store: in-memory dict by default, or a shared memory-mapped file for multi-worker servers
+store = create_store()
+
+MAX_PAGE_SIZE = 1000
+
+# Helper: write items one by one as a chunked JSON array or NDJSON
+def stream_items(after, limit, fmt):
+    if fmt == "ndjson":
+        def generate():
+            for item in store.iter_items(after, limit):
+                yield json.dumps(item) + "\n"
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    def generate():
+        yield "["
+        first = True
+        for item in store.iter_items(after, limit):
+            yield ("" if first else ",") + json.dumps(item)
+            first = False
+        yield "]"
+    return Response(stream_with_context(generate()), mimetype="application/json")
 
 # Create
 @app.route('/items', methods=['POST'])
 def create_item():
-    global next_id
     data = request.get_json()
-    item = {
-        "id": next_id,
-        "name": data.get("name", ""),
-        "value": data.get("value", "")
-    }
-    items[next_id] = item
-    next_id += 1
+    try:
+        item = store.create(data.get("name", ""), data.get("value", ""))
+    except ItemTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+    except StoreFullError as e:
+        return jsonify({"error": str(e)}), 507
     return jsonify(item), 201
 
 # Read all
 @app.route('/items', methods=['GET'])
 def get_items():
-    return jsonify(list(items.values()))
+    after = request.args.get("after", 0, type=int)
+    limit = request.args.get("limit", type=int)
+    stream = request.args.get("stream")
+
+    if limit is not None and limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+
+    filters = {key: request.args[key] for key in ("name", "name_prefix", "value") if key in request.args}
+    if filters:
+        if not hasattr(store, "find"):
+            return jsonify({"error": "Filtering is not supported by this item store"}), 400
+        return jsonify(store.find(after=after, limit=limit, **filters))
+
+    if stream:
+        if stream not in ("json", "ndjson"):
+            return jsonify({"error": "stream must be 'json' or 'ndjson'"}), 400
+        return stream_items(after, limit, stream)
+
+    if limit is None and "after" not in request.args:
+        return jsonify(store.all())
+
+    limit = min(limit or MAX_PAGE_SIZE, MAX_PAGE_SIZE)
+    page = list(store.iter_items(after, limit))
+    response = jsonify(page)
+    if len(page) == limit:
+        response.headers["X-Next-Cursor"] = str(page[-1]["id"])
+    return response
 
 # Read one
 @app.route('/items/<int:item_id>', methods=['GET'])
 def get_item(item_id):
-    item = items.get(item_id)
+    item = store.get(item_id)
     if not item:
         return jsonify({"error": "Item not found"}), 404
     return jsonify(item)
@@ -36,20 +80,22 @@ def get_item(item_id):
 # Update
 @app.route('/items/<int:item_id>', methods=['PUT'])
 def update_item(item_id):
-    item = items.get(item_id)
+    data = request.get_json()
+    fields = {key: data[key] for key in ("name", "value") if key in data}
+    try:
+        item = store.update(item_id, fields)
+    except ItemTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
     if not item:
         return jsonify({"error": "Item not found"}), 404
-    data = request.get_json()
-    item["name"] = data.get("name", item["name"])
-    item["value"] = data.get("value", item["value"])
     return jsonify(item)
 
 # Delete
 @app.route('/items/<int:item_id>', methods=['DELETE'])
 def delete_item(item_id):
-    if item_id not in items:
+    deleted = store.delete(item_id)
+    if not deleted:
         return jsonify({"error": "Item not found"}), 404
-    deleted = items.pop(item_id)
     return jsonify(deleted)
 
 if __name__ == '__main__':
@@ -0,0 +1,41 @@
+"""Show filtered-lookup latency as the store grows, indexed vs a full scan.
+
+Usage: python bench_filter.py [--sizes 10000 100000 1000000] [--lookups 1000]
+"""
+import argparse
+import random
+import time
+
+from index import IndexedItemStore
+from store import MemoryItemStore
+
+
+def scan(store, name):
+    return [item for item in store.iter_items() if item["name"] == name]
+
+
+def timed(fn, args_list):
+    started = time.perf_counter()
+    for args in args_list:
+        fn(*args)
+    return (time.perf_counter() - started) / len(args_list) * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'items':>10} {'exact (us)':>12} {'prefix (us)':>12} {'scan (us)':>12}")
+    for size in args.sizes:
+        store = IndexedItemStore(MemoryItemStore())
+        for i in range(size):
+            store.create(f"item-{i:07d}", str(i % 100))
+
+        names = [f"item-{random.randrange(size):07d}" for _ in range(args.lookups)]
+        exact = timed(lambda name: store.find(name=name), [(n,) for n in names])
+        prefix = timed(lambda name: store.find(name_prefix=name[:-1]), [(n,) for n in names])
+        # A full scan is far slower, so sample fewer lookups
+        full = timed(lambda name: scan(store, name), [(n,) for n in names[:5]])
+        print(f"{size:>10} {exact:>12.1f} {prefix:>12.1f} {full:>12.1f}")
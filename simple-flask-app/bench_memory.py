@@ -0,0 +1,42 @@
+"""Report bytes per item for each ITEM_STORE / ITEM_INDEX combination the app can run.
+
+Usage: python bench_memory.py [--items 1000000]
+"""
+import argparse
+import gc
+import tracemalloc
+
+from index import IndexedItemStore
+from store import CompactItemStore, MemoryItemStore
+
+CATEGORIES = ["Fruit", "Vegetable", "Grain", "Dairy", "Meat"]
+
+
+CONFIGURATIONS = [
+    ("ITEM_STORE=memory (indexed)", lambda: IndexedItemStore(MemoryItemStore())),
+    ("ITEM_STORE=memory ITEM_INDEX=0", MemoryItemStore),
+    ("ITEM_STORE=compact", CompactItemStore),
+    ("ITEM_STORE=compact ITEM_INDEX=1", lambda: IndexedItemStore(CompactItemStore())),
+]
+
+
+def measure(make_store, count):
+    gc.collect()
+    tracemalloc.start()
+    store = make_store()
+    for i in range(count):
+        # Build fresh string objects, like values decoded from a request body
+        store.create("".join(["item-", str(i % 50000)]), "".join(CATEGORIES[i % len(CATEGORIES)]))
+    gc.collect()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return used / count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1000000)
+    args = parser.parse_args()
+
+    for label, make_store in CONFIGURATIONS:
+        print(f"{label}: {measure(make_store, args.items):.0f} bytes/item")
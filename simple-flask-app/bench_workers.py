@@ -0,0 +1,94 @@
+"""Compare requests/sec of the shared item store with 1 worker vs N workers.
+
+Usage: python bench_workers.py [--workers 4] [--clients 16] [--seconds 10]
+
+Starts gunicorn with ITEM_STORE=shared, seeds some items, then hammers
+GET /items/<id> from several client processes.
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+HOST = "127.0.0.1"
+PORT = 5055
+SEED_ITEMS = 1000
+
+
+def request(method, path, body=None):
+    conn = http.client.HTTPConnection(HOST, PORT, timeout=10)
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = conn.getresponse()
+    data = response.read()
+    conn.close()
+    return response.status, data
+
+
+def wait_until_up(timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            request("GET", "/items?limit=1")
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("gunicorn did not start")
+
+
+def client(seconds, results):
+    count = 0
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        status, _ = request("GET", f"/items/{random.randint(1, SEED_ITEMS)}")
+        if status == 200:
+            count += 1
+    results.put(count)
+
+
+def run(workers, clients, seconds):
+    store_path = os.path.join(tempfile.mkdtemp(), "items.store")
+    env = dict(os.environ, ITEM_STORE="shared", SHARED_STORE_PATH=store_path)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-w", str(workers), "-b", f"{HOST}:{PORT}", "app:app"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_up()
+        for i in range(SEED_ITEMS):
+            request("POST", "/items", {"name": f"item-{i}", "value": str(i)})
+
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=client, args=(seconds, results)) for _ in range(clients)]
+        for p in procs:
+            p.start()
+        total = sum(results.get() for _ in procs)
+        for p in procs:
+            p.join()
+        return total / seconds
+    finally:
+        server.terminate()
+        server.wait()
+        os.remove(store_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=int, default=10)
+    args = parser.parse_args()
+
+    single = run(1, args.clients, args.seconds)
+    print(f"1 worker:  {single:,.0f} req/s")
+    multi = run(args.workers, args.clients, args.seconds)
+    print(f"{args.workers} workers: {multi:,.0f} req/s ({multi / single:.1f}x)")
@@ -0,0 +1,103 @@
+from bisect import bisect_left, insort
+import threading
+
+
+class IndexedItemStore:
+    """Wrap an in-process item store with secondary indexes on name and value.
+
+    Exact name and value lookups go through dicts of id sets. Prefix lookups
+    on name bisect into a sorted list of (name, id) pairs. Only string fields
+    are indexed, since query parameters are always strings.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.lock = threading.RLock()
+        self.by_name = {}
+        self.by_value = {}
+        for item in store.iter_items():
+            self._add_to_dicts(item["id"], item["name"], item["value"])
+        # Sort once instead of inserting item by item, which would be O(n^2) at startup
+        self.sorted_names = sorted(
+            (name, item_id) for name, ids in self.by_name.items() for item_id in ids
+        )
+
+    def _add_to_dicts(self, item_id, name, value):
+        if isinstance(name, str):
+            self.by_name.setdefault(name, set()).add(item_id)
+        if isinstance(value, str):
+            self.by_value.setdefault(value, set()).add(item_id)
+
+    def _add(self, item_id, name, value):
+        self._add_to_dicts(item_id, name, value)
+        if isinstance(name, str):
+            insort(self.sorted_names, (name, item_id))
+
+    def _remove(self, item_id, name, value):
+        if isinstance(name, str):
+            ids = self.by_name[name]
+            ids.discard(item_id)
+            if not ids:
+                del self.by_name[name]
+            del self.sorted_names[bisect_left(self.sorted_names, (name, item_id))]
+        if isinstance(value, str):
+            ids = self.by_value[value]
+            ids.discard(item_id)
+            if not ids:
+                del self.by_value[value]
+
+    def create(self, name, value):
+        with self.lock:
+            item = self.store.create(name, value)
+            self._add(item["id"], item["name"], item["value"])
+        return item
+
+    def get(self, item_id):
+        return self.store.get(item_id)
+
+    def update(self, item_id, fields):
+        with self.lock:
+            old = self.store.get(item_id)
+            if old is None:
+                return None
+            old_name, old_value = old["name"], old["value"]
+            item = self.store.update(item_id, fields)
+            self._remove(item_id, old_name, old_value)
+            self._add(item_id, item["name"], item["value"])
+        return item
+
+    def delete(self, item_id):
+        with self.lock:
+            item = self.store.delete(item_id)
+            if item is not None:
+                self._remove(item_id, item["name"], item["value"])
+        return item
+
+    def all(self):
+        return self.store.all()
+
+    def iter_items(self, after=0, limit=None):
+        return self.store.iter_items(after, limit)
+
+    def _prefix_ids(self, prefix):
+        ids = set()
+        pos = bisect_left(self.sorted_names, (prefix,))
+        while pos < len(self.sorted_names) and self.sorted_names[pos][0].startswith(prefix):
+            ids.add(self.sorted_names[pos][1])
+            pos += 1
+        return ids
+
+    def find(self, name=None, name_prefix=None, value=None, after=0, limit=None):
+        """Return items matching every given filter, in id order."""
+        with self.lock:
+            candidates = []
+            if name is not None:
+                candidates.append(self.by_name.get(name, set()))
+            if name_prefix is not None:
+                candidates.append(self._prefix_ids(name_prefix))
+            if value is not None:
+                candidates.append(self.by_value.get(value, set()))
+            candidates.sort(key=len)
+            ids = set(candidates[0]).intersection(*candidates[1:])
+            matched = sorted(item_id for item_id in ids if item_id > after)[:limit]
+            return [self.store.get(item_id) for item_id in matched]
@@ -0,0 +1,236 @@
+from array import array
+import atexit
+import glob
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+
+from store import MemoryItemStore
+
+# Log record: crc32 of the rest, op, item id, payload length, then a JSON [name, value] payload
+LOG_CRC = struct.Struct("<I")
+LOG_HEADER = struct.Struct("<BQI")
+OP_PUT = 1
+OP_DELETE = 2
+
+# Snapshot: magic, version, next id, item count, then the packed item ids
+# followed by one JSON array of [name, value] pairs in the same order
+SNAPSHOT_MAGIC = b"ITMS"
+SNAPSHOT_HEADER = struct.Struct("<4sHQQ")
+
+
+class ItemLog:
+    """Append-only log file with fsync batched on a background thread."""
+
+    def __init__(self, path, fsync_interval):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.file = open(path, "ab")
+        self.records = 0
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    def append(self, op, item_id, payload=b""):
+        record = LOG_HEADER.pack(op, item_id, len(payload)) + payload
+        with self.lock:
+            self.file.write(LOG_CRC.pack(zlib.crc32(record)) + record)
+            self.records += 1
+            if self.fsync_interval:
+                self.dirty = True
+            else:
+                self._sync()
+
+    def sync(self):
+        with self.lock:
+            if self.dirty:
+                self._sync()
+
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.dirty = False
+
+    def close(self):
+        with self.lock:
+            self._sync()
+            self.file.close()
+
+
+def read_log(path):
+    """Yield (op, item_id, payload) records, stopping at a torn or corrupt tail."""
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    record_size = LOG_CRC.size + LOG_HEADER.size
+    while offset + record_size <= len(data):
+        (crc,) = LOG_CRC.unpack_from(data, offset)
+        op, item_id, length = LOG_HEADER.unpack_from(data, offset + LOG_CRC.size)
+        start = offset + record_size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(data[offset + LOG_CRC.size:start + length]) != crc:
+            break
+        yield op, item_id, payload
+        offset = start + length
+
+
+def write_snapshot(path, next_id, ids, pairs):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, 1, next_id, len(ids)))
+        f.write(array("Q", ids).tobytes())
+        f.write(json.dumps(pairs, separators=(",", ":")).encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path):
+    """Return (next_id, ids, [[name, value], ...]) from a snapshot file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, next_id, count = SNAPSHOT_HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC or version != 1:
+        raise ValueError(f"{path} is not an item snapshot")
+    ids_end = SNAPSHOT_HEADER.size + count * 8
+    ids = array("Q")
+    ids.frombytes(data[SNAPSHOT_HEADER.size:ids_end])
+    pairs = json.loads(data[ids_end:])
+    return next_id, ids.tolist(), pairs
+
+
+def _seq(path):
+    return int(os.path.basename(path).split("-")[1].split(".")[0])
+
+
+class PersistentItemStore(MemoryItemStore):
+    """In-memory store that survives restarts through a write-ahead log and snapshots.
+
+    Every create, update and delete is appended to log-<seq>.bin before the
+    call returns. Once the log holds snapshot_every records it is rotated and
+    snapshot-<seq>.bin is written in the background with the state as of the
+    start of the new log. Startup loads the newest snapshot and replays only
+    the logs from that sequence on, then writes a fresh snapshot if it
+    replayed at least snapshot_after_replay records.
+    """
+
+    def __init__(self, directory, fsync_interval=0.05, snapshot_every=100000, snapshot_after_replay=10000):
+        super().__init__()
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        self.snapshotting = False
+        os.makedirs(directory, exist_ok=True)
+
+        self.snapshot_items, self.replayed, seq = self._recover()
+
+        self.seq = seq
+        self.log = ItemLog(self._path("log", seq), fsync_interval)
+        if fsync_interval:
+            threading.Thread(target=self._sync_loop, daemon=True).start()
+        atexit.register(lambda: self.log.sync())
+        # Every start opens a new log, so frequent restarts would otherwise leave
+        # a growing pile of short logs to replay, none reaching snapshot_every
+        if self.replayed and self.replayed >= snapshot_after_replay:
+            self._start_snapshot(None)
+
+    def _path(self, kind, seq):
+        return os.path.join(self.directory, f"{kind}-{seq:08d}.bin")
+
+    def _recover(self):
+        snapshots = sorted(glob.glob(os.path.join(self.directory, "snapshot-*.bin")), key=_seq)
+        seq = 0
+        snapshot_items = 0
+        if snapshots:
+            seq = _seq(snapshots[-1])
+            self.next_id, ids, pairs = read_snapshot(snapshots[-1])
+            self.items = {
+                item_id: {"id": item_id, "name": name, "value": value}
+                for item_id, (name, value) in zip(ids, pairs)
+            }
+            self.item_ids = ids
+            snapshot_items = len(ids)
+
+        replayed = 0
+        logs = sorted(glob.glob(os.path.join(self.directory, "log-*.bin")), key=_seq)
+        for path in logs:
+            if _seq(path) < seq:
+                continue
+            for op, item_id, payload in read_log(path):
+                self._apply(op, item_id, payload)
+                replayed += 1
+            seq = max(seq, _seq(path))
+        # Start a fresh log so a torn tail in the last one is never appended to
+        return snapshot_items, replayed, seq + 1
+
+    def _apply(self, op, item_id, payload):
+        if op == OP_DELETE:
+            MemoryItemStore.delete(self, item_id)
+            return
+        name, value = json.loads(payload)
+        if item_id in self.items:
+            self.items[item_id].update(name=name, value=value)
+        else:
+            self.items[item_id] = {"id": item_id, "name": name, "value": value}
+            self.item_ids.append(item_id)
+            self.next_id = max(self.next_id, item_id + 1)
+
+    def _log_put(self, item):
+        self.log.append(OP_PUT, item["id"], json.dumps([item["name"], item["value"]]).encode("utf-8"))
+        self._maybe_snapshot()
+
+    def create(self, name, value):
+        with self.lock:
+            item = super().create(name, value)
+            self._log_put(item)
+        return item
+
+    def update(self, item_id, fields):
+        with self.lock:
+            item = super().update(item_id, fields)
+            if item is not None:
+                self._log_put(item)
+        return item
+
+    def delete(self, item_id):
+        with self.lock:
+            item = super().delete(item_id)
+            if item is not None:
+                self.log.append(OP_DELETE, item_id)
+                self._maybe_snapshot()
+        return item
+
+    def _sync_loop(self):
+        while True:
+            time.sleep(self.fsync_interval)
+            self.log.sync()
+
+    # Called with self.lock held
+    def _maybe_snapshot(self):
+        if self.snapshotting or self.log.records < self.snapshot_every:
+            return
+        old_log = self.log
+        self.seq += 1
+        self.log = ItemLog(self._path("log", self.seq), self.fsync_interval)
+        self._start_snapshot(old_log)
+
+    # Snapshot the state as of the start of the current log; old_log is closed first if given
+    def _start_snapshot(self, old_log):
+        self.snapshotting = True
+        ids = list(self.items)
+        pairs = [[item["name"], item["value"]] for item in self.items.values()]
+        threading.Thread(target=self._snapshot, args=(old_log, self.seq, self.next_id, ids, pairs), daemon=True).start()
+
+    def _snapshot(self, old_log, seq, next_id, ids, pairs):
+        try:
+            if old_log is not None:
+                old_log.close()
+            write_snapshot(self._path("snapshot", seq), next_id, ids, pairs)
+            for kind in ("snapshot", "log"):
+                for path in glob.glob(os.path.join(self.directory, f"{kind}-*.bin")):
+                    if _seq(path) < seq:
+                        os.remove(path)
+        finally:
+            self.snapshotting = False
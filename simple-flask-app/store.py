@@ -0,0 +1,369 @@
+from array import array
+from bisect import bisect_left, bisect_right
+import fcntl
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+from index import IndexedItemStore
+
+
+class StoreFullError(Exception):
+    pass
+
+
+class ItemTooLargeError(Exception):
+    pass
+
+
+# ------------------- IN-MEMORY STORE -------------------
+
+class MemoryItemStore:
+    """Items kept in a dict owned by a single process.
+
+    Deleted ids stay in item_ids, where iter_items skips them, until they make
+    up half of the list; it is then rebuilt from the dict in one pass.
+    """
+
+    def __init__(self):
+        self.items = {}
+        self.item_ids = []  # ids in ascending order, used as the pagination cursor index
+        self.next_id = 1
+        self.lock = threading.RLock()
+
+    def create(self, name, value):
+        with self.lock:
+            item = {"id": self.next_id, "name": name, "value": value}
+            self.items[self.next_id] = item
+            self.item_ids.append(self.next_id)  # ids only grow, so appending keeps the list sorted
+            self.next_id += 1
+        return item
+
+    def get(self, item_id):
+        return self.items.get(item_id)
+
+    def update(self, item_id, fields):
+        with self.lock:
+            item = self.items.get(item_id)
+            if item is None:
+                return None
+            item.update(fields)
+        return item
+
+    def delete(self, item_id):
+        with self.lock:
+            item = self.items.pop(item_id, None)
+            if item is not None and len(self.items) * 2 < len(self.item_ids):
+                self._compact()
+        return item
+
+    # The dict keeps creation order, which is id order, so the rebuilt list stays sorted.
+    # It replaces the old list instead of editing it, so iter_items never sees it half done
+    def _compact(self):
+        self.item_ids = list(self.items)
+
+    def all(self):
+        return list(self.items.values())
+
+    # Walk items in id order starting after the given cursor, without copying the store
+    def iter_items(self, after=0, limit=None):
+        count = 0
+        while limit is None or count < limit:
+            pos = bisect_right(self.item_ids, after)
+            if pos >= len(self.item_ids):
+                return
+            after = self.item_ids[pos]
+            item = self.items.get(after)
+            if item is not None:
+                yield item
+                count += 1
+
+
+# ------------------- COMPACT STORE -------------------
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class CompactItemStore:
+    """Items kept as parallel columns instead of one dict per item.
+
+    Ids live in a packed array in ascending order, names and values in two
+    plain lists at the same position, and an alive flag marks deleted rows.
+    String fields are interned so repeated names and values share one object.
+    Deleted rows are dropped once they make up half of the columns.
+    """
+
+    def __init__(self):
+        self.ids = array("Q")
+        self.names = []
+        self.values = []
+        self.alive = bytearray()
+        self.deleted = 0
+        self.next_id = 1
+        self.lock = threading.RLock()
+
+    def _find(self, item_id):
+        pos = bisect_left(self.ids, item_id)
+        if pos < len(self.ids) and self.ids[pos] == item_id and self.alive[pos]:
+            return pos
+        return None
+
+    def _row(self, pos):
+        return {"id": self.ids[pos], "name": self.names[pos], "value": self.values[pos]}
+
+    def create(self, name, value):
+        with self.lock:
+            item_id = self.next_id
+            self.ids.append(item_id)
+            self.names.append(_intern(name))
+            self.values.append(_intern(value))
+            self.alive.append(1)
+            self.next_id += 1
+        return {"id": item_id, "name": name, "value": value}
+
+    def get(self, item_id):
+        with self.lock:
+            pos = self._find(item_id)
+            return None if pos is None else self._row(pos)
+
+    def update(self, item_id, fields):
+        with self.lock:
+            pos = self._find(item_id)
+            if pos is None:
+                return None
+            if "name" in fields:
+                self.names[pos] = _intern(fields["name"])
+            if "value" in fields:
+                self.values[pos] = _intern(fields["value"])
+            return self._row(pos)
+
+    def delete(self, item_id):
+        with self.lock:
+            pos = self._find(item_id)
+            if pos is None:
+                return None
+            item = self._row(pos)
+            self.alive[pos] = 0
+            self.names[pos] = self.values[pos] = None
+            self.deleted += 1
+            if self.deleted * 2 > len(self.ids):
+                self._compact()
+        return item
+
+    def _compact(self):
+        keep = [pos for pos, alive in enumerate(self.alive) if alive]
+        self.ids = array("Q", (self.ids[pos] for pos in keep))
+        self.names = [self.names[pos] for pos in keep]
+        self.values = [self.values[pos] for pos in keep]
+        self.alive = bytearray(b"\x01" * len(keep))
+        self.deleted = 0
+
+    def all(self):
+        return list(self.iter_items())
+
+    def iter_items(self, after=0, limit=None):
+        count = 0
+        while limit is None or count < limit:
+            with self.lock:
+                pos = bisect_right(self.ids, after)
+                while pos < len(self.ids) and not self.alive[pos]:
+                    pos += 1
+                if pos >= len(self.ids):
+                    return
+                item = self._row(pos)
+            after = item["id"]
+            yield item
+            count += 1
+
+
+# ------------------- SHARED-MEMORY STORE -------------------
+
+HEADER = struct.Struct("<Q")      # last allocated id
+SLOT_HEADER = struct.Struct("<BH")  # used flag, payload length
+HEADER_SIZE = 64
+SLOT_LOCK_STRIPES = 64
+
+
+class SharedItemStore:
+    """Items kept in a memory-mapped file shared by every worker process.
+
+    The file holds a small header with the last allocated id, followed by one
+    fixed-size slot per id. The id allocator locks only the header and each
+    read or write locks only its own slot, using fcntl record locks between
+    processes and striped thread locks inside a process.
+    """
+
+    def __init__(self, path, capacity=100000, slot_size=512):
+        self.path = path
+        self.capacity = capacity
+        self.slot_size = slot_size
+        self.max_payload = slot_size - SLOT_HEADER.size
+        size = HEADER_SIZE + capacity * slot_size
+
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.lockf(self.fd, fcntl.LOCK_EX, HEADER_SIZE, 0)
+        try:
+            if os.fstat(self.fd).st_size < size:
+                os.ftruncate(self.fd, size)
+        finally:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, HEADER_SIZE, 0)
+        self.mm = mmap.mmap(self.fd, size, mmap.MAP_SHARED)
+
+        self.header_lock = threading.Lock()
+        self.slot_locks = [threading.Lock() for _ in range(SLOT_LOCK_STRIPES)]
+
+    def _offset(self, item_id):
+        return HEADER_SIZE + (item_id - 1) * self.slot_size
+
+    def _locked(self, item_id, exclusive):
+        return _SlotLock(self, item_id, exclusive)
+
+    def _read(self, item_id):
+        offset = self._offset(item_id)
+        used, length = SLOT_HEADER.unpack_from(self.mm, offset)
+        if not used:
+            return None
+        start = offset + SLOT_HEADER.size
+        name, value = json.loads(self.mm[start:start + length])
+        return {"id": item_id, "name": name, "value": value}
+
+    def _encode(self, name, value):
+        payload = json.dumps([name, value]).encode("utf-8")
+        if len(payload) > self.max_payload:
+            raise ItemTooLargeError(f"Item must encode to at most {self.max_payload} bytes")
+        return payload
+
+    def _write(self, item_id, payload):
+        offset = self._offset(item_id)
+        start = offset + SLOT_HEADER.size
+        self.mm[start:start + len(payload)] = payload
+        SLOT_HEADER.pack_into(self.mm, offset, 1, len(payload))
+
+    def _allocate_id(self):
+        with self.header_lock:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, HEADER.size, 0)
+            try:
+                (last_id,) = HEADER.unpack_from(self.mm, 0)
+                if last_id >= self.capacity:
+                    raise StoreFullError("Item store is full")
+                HEADER.pack_into(self.mm, 0, last_id + 1)
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, HEADER.size, 0)
+        return last_id + 1
+
+    def last_id(self):
+        return HEADER.unpack_from(self.mm, 0)[0]
+
+    def _valid(self, item_id):
+        return 1 <= item_id <= self.last_id()
+
+    def create(self, name, value):
+        payload = self._encode(name, value)
+        item_id = self._allocate_id()
+        with self._locked(item_id, exclusive=True):
+            self._write(item_id, payload)
+        return {"id": item_id, "name": name, "value": value}
+
+    def get(self, item_id):
+        if not self._valid(item_id):
+            return None
+        with self._locked(item_id, exclusive=False):
+            return self._read(item_id)
+
+    def update(self, item_id, fields):
+        if not self._valid(item_id):
+            return None
+        with self._locked(item_id, exclusive=True):
+            item = self._read(item_id)
+            if item is None:
+                return None
+            item.update(fields)
+            self._write(item_id, self._encode(item["name"], item["value"]))
+        return item
+
+    def delete(self, item_id):
+        if not self._valid(item_id):
+            return None
+        with self._locked(item_id, exclusive=True):
+            item = self._read(item_id)
+            if item is not None:
+                SLOT_HEADER.pack_into(self.mm, self._offset(item_id), 0, 0)
+        return item
+
+    def all(self):
+        return list(self.iter_items())
+
+    def iter_items(self, after=0, limit=None):
+        count = 0
+        item_id = max(after, 0)
+        while limit is None or count < limit:
+            item_id += 1
+            if item_id > self.last_id():
+                return
+            item = self.get(item_id)
+            if item is not None:
+                yield item
+                count += 1
+
+
+class _SlotLock:
+    """Hold a slot's thread stripe lock and its fcntl record lock together."""
+
+    def __init__(self, store, item_id, exclusive):
+        self.store = store
+        self.start = store._offset(item_id)
+        self.thread_lock = store.slot_locks[item_id % SLOT_LOCK_STRIPES]
+        self.mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        fcntl.lockf(self.store.fd, self.mode, self.store.slot_size, self.start)
+
+    def __exit__(self, *exc):
+        fcntl.lockf(self.store.fd, fcntl.LOCK_UN, self.store.slot_size, self.start)
+        self.thread_lock.release()
+
+
+def with_index(store, default):
+    """Wrap the store in IndexedItemStore if ITEM_INDEX is on (default given per backend)."""
+    enabled = os.getenv("ITEM_INDEX", "1" if default else "0").lower() in ("1", "true", "yes", "on")
+    return IndexedItemStore(store) if enabled else store
+
+
+def create_store():
+    """Pick the storage backend from the ITEM_STORE environment variable."""
+    backend = os.getenv("ITEM_STORE", "memory")
+    if backend == "shared":
+        return SharedItemStore(
+            os.getenv("SHARED_STORE_PATH", "/dev/shm/flask-items.store"),
+            capacity=int(os.getenv("SHARED_STORE_CAPACITY", 100000)),
+            slot_size=int(os.getenv("SHARED_STORE_SLOT_SIZE", 512)),
+        )
+    if backend == "memory":
+        log_dir = os.getenv("ITEM_LOG_DIR")
+        if log_dir:
+            from persistence import PersistentItemStore
+            started = time.perf_counter()
+            persistent = PersistentItemStore(
+                log_dir,
+                fsync_interval=float(os.getenv("ITEM_LOG_FSYNC_INTERVAL", 0.05)),
+                snapshot_every=int(os.getenv("ITEM_LOG_SNAPSHOT_EVERY", 100000)),
+                snapshot_after_replay=int(os.getenv("ITEM_LOG_SNAPSHOT_AFTER_REPLAY", 10000)),
+            )
+            store = with_index(persistent, default=True)
+            # Recovery is only done once the indexes over the recovered items are built too
+            print(
+                f"Recovered {len(persistent.items)} items in {time.perf_counter() - started:.2f}s "
+                f"({persistent.snapshot_items} from snapshot, {persistent.replayed} log records replayed)"
+            )
+            return store
+        return with_index(MemoryItemStore(), default=True)
+    if backend == "compact":
+        # Indexes cost several times the compact columns themselves, so they are opt-in here
+        return with_index(CompactItemStore(), default=False)
+    raise ValueError(f"Unknown ITEM_STORE backend: {backend}")